@@ -29,6 +29,10 @@ from pathlib import Path
 from typing import Dict, Optional, Tuple
 
 
+# Print a progress update at least every this many files (also time-based below)
+PROGRESS_INTERVAL = 1000
+
+
 # ANSI color codes for terminal output
 class Colors:
     HEADER = '\033[95m'
@@ -352,9 +356,9 @@ def create_symlink_farm(
     print()
     
     for i, (file_id, meta) in enumerate(file_dic.items()):
-        # Progress bar - update every 0.5 seconds or every 1000 files
+        # Progress bar - update every 0.5 seconds or every PROGRESS_INTERVAL files
         current_time = time.time()
-        if current_time - last_update >= 0.5 or (i + 1) % 1000 == 0 or i == total - 1:
+        if current_time - last_update >= 0.5 or (i + 1) % PROGRESS_INTERVAL == 0 or i == total - 1:
             print_progress_bar(i + 1, total, prefix="Progress: ")
             last_update = current_time
         
@@ -602,7 +606,8 @@ Now you can use rsync to verify or sync your backup:
     return 0 if errors == 0 else 1
 
 
-def main():
+def main(argv=None):
+    """Entry point. ``argv`` defaults to sys.argv; tests pass a list."""
     parser = argparse.ArgumentParser(
         description='Create a symlink farm from MyCloud database for rsync verification/copying',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -626,8 +631,8 @@ Examples:
     parser.add_argument('--dry-run', '-n', action='store_true', help='Dry run - do not create symlinks')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
     
-    args = parser.parse_args()
-    
+    args = parser.parse_args(argv)
+
     # If wizard mode or no arguments, run wizard
     if args.wizard or (not args.db and not args.source and not args.farm):
         return run_wizard()
@@ -1,5 +1,7 @@
 import argparse
 import copy
+import errno
+import hashlib
 import logging
 import multiprocessing
 import os
@@ -11,7 +13,8 @@ import threading
 import time
 import os
 import traceback
-from collections import defaultdict
+import atexit
+from collections import defaultdict, deque
 try:
     import psutil
 except ImportError:
@@ -40,16 +43,16 @@ from threading import Thread
 
 # Thread-safe database connection pool to prevent FD leaks
 _db_lock = threading.Lock()
-_db_connections = {}  # thread_id -> connection
+_db_connections = {}  # (thread_id, db_path) -> connection
 
 def get_thread_db_connection(db_path):
-    """Get or create a thread-local database connection."""
-    thread_id = threading.get_ident()
-    if thread_id not in _db_connections:
+    """Get or create a thread-local database connection for db_path."""
+    key = (threading.get_ident(), db_path)
+    if key not in _db_connections:
         conn = sqlite3.connect(db_path, check_same_thread=False)
         conn.execute("PRAGMA busy_timeout=5000")
-        _db_connections[thread_id] = conn
-    return _db_connections[thread_id]
+        _db_connections[key] = conn
+    return _db_connections[key]
 
 def close_all_db_connections():
     """Close all thread-local database connections."""
@@ -97,7 +100,9 @@ except ImportError as e:
 current_time = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
 
 # log_filename is used to store run information, such as progress and errors, in a timestamped log file.
-log_filename = f'summary_{current_time}.log'
+# RESTSDK_SUMMARY_DIR relocates it (the test suite points it at a temp dir
+# so importing this module doesn't drop log files into the repository).
+log_filename = os.path.join(os.environ.get('RESTSDK_SUMMARY_DIR', ''), f'summary_{current_time}.log')
 
 # log_file is used to track the files that have been successfully copied to avoid duplication in future runs.
 # log_file = args.log_file
@@ -187,6 +192,14 @@ def init_copy_tracking_tables(db_path):
     """
     with sqlite3.connect(db_path) as conn:
         conn.execute("PRAGMA busy_timeout=5000")
+        # WAL batches fsyncs per transaction instead of per statement, which
+        # matters once regen/copy start inserting in bulk. NORMAL sync is
+        # safe under WAL (loses at most the last transaction on power cut),
+        # and the memory pragmas keep sort/spill traffic off the disk.
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-200000")
         c = conn.cursor()
         c.execute('''CREATE TABLE IF NOT EXISTS copied_files (
             file_id TEXT PRIMARY KEY,
@@ -199,6 +212,11 @@ def init_copy_tracking_tables(db_path):
         cols = {row[1] for row in c.fetchall()}
         if "mtime_refreshed" not in cols:
             c.execute("ALTER TABLE copied_files ADD COLUMN mtime_refreshed INTEGER DEFAULT 0")
+        if "path" not in cols:
+            c.execute("ALTER TABLE copied_files ADD COLUMN path TEXT")
+        # Unique path index backs _CopiedSet's definitive membership check
+        # (SQLite allows multiple NULLs, so legacy rows are unaffected)
+        c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_copied_path ON copied_files(path)")
         c.execute('''CREATE TABLE IF NOT EXISTS skipped_files (
             filename TEXT PRIMARY KEY,
             reason TEXT,
@@ -206,15 +224,137 @@ def init_copy_tracking_tables(db_path):
         )''')
         conn.commit()
 
-def insert_copied_file(db_path, file_id, filename):
+class _CopiedSet:
+    """
+    Memory-lean membership test for already-copied destination paths.
+
+    A Bloom filter (bytearray bit field with double hashing, ~10 bits per
+    element) answers the common negative case without touching the database.
+    A bloom hit is confirmed against the unique copied_files.path index, so
+    false positives can never skip a real copy. At millions of paths this
+    replaces ~100+ bytes per interned path string with a shared bit field.
+    Without a backing database (some tests build one standalone) paths are
+    kept in an exact set instead, since there is nothing to confirm against.
+    """
+
+    _NUM_HASHES = 7
+
+    def __init__(self, db_path=None, expected=1_000_000, bits_per_item=10):
+        self._db_path = db_path
+        self._nbits = max(expected * bits_per_item, 1024)
+        self._bits = bytearray((self._nbits + 7) // 8)
+        self._exact = set()
+        self._count = 0
+
+    def _bit_positions(self, path):
+        digest = hashlib.blake2b(path.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        nbits = self._nbits
+        return [(h1 + i * h2) % nbits for i in range(self._NUM_HASHES)]
+
+    def add(self, path):
+        for pos in self._bit_positions(path):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        if self._db_path is None:
+            self._exact.add(path)
+        self._count += 1
+
+    def update(self, paths):
+        for path in paths:
+            self.add(path)
+
+    def __contains__(self, path):
+        for pos in self._bit_positions(path):
+            if not self._bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        if path in self._exact:
+            return True
+        return self._db_has(path)
+
+    def __len__(self):
+        return len(self._exact) if self._db_path is None else self._count
+
+    def _db_has(self, path):
+        if not self._db_path:
+            return False
+        try:
+            with _db_lock:
+                conn = get_thread_db_connection(self._db_path)
+                cur = conn.execute("SELECT 1 FROM copied_files WHERE path=? LIMIT 1", (path,))
+                return cur.fetchone() is not None
+        except sqlite3.Error:
+            return False
+
+# Buffered tracking writes. copy_file appends rows here and _flush_tracking
+# drains both buffers in one executemany/transaction per batch, so bulk
+# copies and skips cost one fsync per ~500 files instead of one per file.
+_copied_buffer = deque()
+_skip_buffer = deque()
+_tracking_flush_rows = 500
+_tracking_flush_secs = 2.0
+_tracking_last_flush = time.monotonic()
+_tracking_db_path = None
+# Serializes the threshold check and buffer drain below; copy workers are
+# threads and two of them crossing the threshold together would otherwise
+# both drain (popleft past empty) and lose rows.
+_tracking_lock = threading.Lock()
+
+def _flush_tracking(db_path, force=False):
+    """
+    Flush buffered copied/skipped rows to the tracking tables. No-op until
+    the buffers reach the row threshold or the flush interval elapses,
+    unless force is set.
+    """
+    global _tracking_last_flush, _tracking_db_path
+    _tracking_db_path = db_path
+    with _tracking_lock:
+        pending = len(_copied_buffer) + len(_skip_buffer)
+        if not pending:
+            return
+        if (not force and pending < _tracking_flush_rows
+                and time.monotonic() - _tracking_last_flush < _tracking_flush_secs):
+            return
+        copied_rows = [_copied_buffer.popleft() for _ in range(len(_copied_buffer))]
+        skipped_rows = [_skip_buffer.popleft() for _ in range(len(_skip_buffer))]
+
+    def _op():
+        with _db_lock:
+            conn = get_thread_db_connection(db_path)
+            c = conn.cursor()
+            if copied_rows:
+                c.executemany(
+                    '''INSERT OR IGNORE INTO copied_files (file_id, filename, path, mtime_refreshed) VALUES (?, ?, ?, 0)''',
+                    copied_rows,
+                )
+            if skipped_rows:
+                c.executemany(
+                    '''INSERT OR IGNORE INTO skipped_files (filename, reason) VALUES (?, ?)''',
+                    skipped_rows,
+                )
+            conn.commit()
+    with_retry_db(_op)
+    _tracking_last_flush = time.monotonic()
+
+def _flush_tracking_at_exit():
+    """Make sure buffered tracking rows hit the database on shutdown."""
+    if _tracking_db_path and (_copied_buffer or _skip_buffer):
+        try:
+            _flush_tracking(_tracking_db_path, force=True)
+        except sqlite3.Error:
+            pass
+
+atexit.register(_flush_tracking_at_exit)
+
+def insert_copied_file(db_path, file_id, filename, path=None):
     """Insert a copied file record using thread-local connection."""
     def _op():
         with _db_lock:
             conn = get_thread_db_connection(db_path)
             c = conn.cursor()
             c.execute(
-                '''INSERT OR IGNORE INTO copied_files (file_id, filename, mtime_refreshed) VALUES (?, ?, 0)''',
-                (str(file_id), str(filename)),
+                '''INSERT OR IGNORE INTO copied_files (file_id, filename, path, mtime_refreshed) VALUES (?, ?, ?, 0)''',
+                (str(file_id), str(filename), path),
             )
             conn.commit()
     with_retry_db(_op)
@@ -302,50 +442,99 @@ def regenerate_copied_files_from_dest(db_path, dumpdir, log_file):
     print(f"Built lookup with {len(path_to_file_id)} file paths")
     
     print("Scanning destination directory and regenerating log file...")
-    with sqlite3.connect(db_path) as conn:
+
+    def _scan_tree(scan_root):
+        """Collect all file paths under scan_root (worker for the parallel scan)."""
+        found = []
+        for root, dirs, files in os.walk(scan_root):
+            for file in files:
+                found.append(os.path.join(root, file))
+        return found
+
+    # Shard the scan by top-level directory so independent subtrees are walked
+    # in parallel; readdir/stat syscalls on each shard overlap across threads.
+    dest_paths = []
+    shards = []
+    try:
+        with os.scandir(dumpdir) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    shards.append(entry.path)
+                else:
+                    dest_paths.append(entry.path)
+    except OSError:
+        pass
+    if shards:
+        with ThreadPoolExecutor(max_workers=min(8, len(shards))) as scan_pool:
+            for shard_paths in scan_pool.map(_scan_tree, shards):
+                dest_paths.extend(shard_paths)
+
+    # isolation_level=None disables the sqlite3 module's implicit
+    # transaction handling; each flush below opens and commits exactly one
+    # transaction instead of relying on hidden BEGINs.
+    with sqlite3.connect(db_path, isolation_level=None) as conn:
         conn.execute("PRAGMA busy_timeout=5000")
         c = conn.cursor()
-        with open(tmp_log, 'w') as f:
-            for root, dirs, files in os.walk(dumpdir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    f.write(file_path + '\n')
-                    
-                    # Compute relative path from dumpdir
-                    rel_path = os.path.relpath(file_path, dumpdir)
-                    rel_path = rel_path.replace("\\", "/").lstrip("/")
-                    
-                    # Try to match by full relative path (most accurate)
-                    file_id = path_to_file_id.get(rel_path)
-                    
-                    # If not found, try with pipes (in case --sanitize-pipes was used)
-                    if not file_id and "-" in rel_path:
-                        rel_path_with_pipes = rel_path.replace("-", "|")
-                        file_id = path_to_file_id.get(rel_path_with_pipes)
-                    
-                    if file_id:
-                        # Store the relative path in filename column (matches what the copy function logs)
-                        c.execute('INSERT OR IGNORE INTO copied_files (file_id, filename) VALUES (?, ?)', 
-                                  (str(file_id), str(rel_path)))
-                        if c.rowcount == 1:
-                            matched_files += 1
-                            if matched_files <= 10 or matched_files % 1000 == 0:
-                                print(f"  [MATCH] {rel_path} -> file_id={file_id}")
-                    else:
-                        unmatched_files += 1
-                        if unmatched_files <= 10:
-                            print(f"  [NO MATCH] {rel_path} (not in source DB - may be manually added)")
-                    
-                    total_files += 1
-                    if total_files % 10000 == 0:
-                        print(f"  Progress: {total_files} files scanned, {matched_files} matched, {unmatched_files} unmatched...")
-                        conn.commit()
-        
+
+        # Matched rows are buffered and flushed with executemany so each
+        # batch costs one transaction/fsync instead of one per file.
+        pending_rows = []
+        flush_every = 1000
+
+        def _flush_matches():
+            if pending_rows:
+                c.execute("BEGIN")
+                c.executemany(
+                    'INSERT OR IGNORE INTO copied_files (file_id, filename, path) VALUES (?, ?, ?)',
+                    pending_rows,
+                )
+                c.execute("COMMIT")
+                pending_rows.clear()
+
+        # Emit the log in one buffered join-write rather than a write call
+        # per matched path; the scan already produced the full list.
+        with open(tmp_log, 'w', buffering=1 << 20) as f:
+            if dest_paths:
+                f.write('\n'.join(dest_paths))
+                f.write('\n')
+
+        for file_path in dest_paths:
+            # Compute relative path from dumpdir
+            rel_path = os.path.relpath(file_path, dumpdir)
+            rel_path = rel_path.replace("\\", "/").lstrip("/")
+            
+            # Try to match by full relative path (most accurate)
+            file_id = path_to_file_id.get(rel_path)
+            
+            # If not found, try with pipes (in case --sanitize-pipes was used)
+            if not file_id and "-" in rel_path:
+                rel_path_with_pipes = rel_path.replace("-", "|")
+                file_id = path_to_file_id.get(rel_path_with_pipes)
+            
+            if file_id:
+                # Store the relative path in filename column (matches what the
+                # copy function logs) plus the absolute destination path, which
+                # is what _CopiedSet confirms bloom hits against
+                pending_rows.append((str(file_id), str(rel_path), file_path))
+                matched_files += 1
+                if matched_files <= 10 or matched_files % 1000 == 0:
+                    print(f"  [MATCH] {rel_path} -> file_id={file_id}")
+                if len(pending_rows) >= flush_every:
+                    _flush_matches()
+            else:
+                unmatched_files += 1
+                if unmatched_files <= 10:
+                    print(f"  [NO MATCH] {rel_path} (not in source DB - may be manually added)")
+            
+            total_files += 1
+            if total_files % 10000 == 0:
+                print(f"  Progress: {total_files} files scanned, {matched_files} matched, {unmatched_files} unmatched...")
+        _flush_matches()
+
         print(f"\nFinished scanning destination directory.")
         print(f"  Total files scanned: {total_files}")
         print(f"  Matched to source DB: {matched_files}")
         print(f"  Not in source DB: {unmatched_files} (these are ignored - may be manually added files)")
-        conn.commit()
     os.replace(tmp_log, log_file)
     
     # Free memory from temporary dictionaries used only for log regeneration
@@ -377,34 +566,63 @@ def hasAnotherParent(fileID):
     else:
         return False
     
+# Memoized parent-chain prefixes for findTree. Keyed by file id; the cache is
+# discarded whenever fileDIC is swapped out for a new dictionary (tests
+# monkeypatch it, and the main block rebuilds it per run).
+_path_prefix_cache = {}
+_path_prefix_source = None
+
+def _path_prefix(fileID):
+    """
+    Return the path from the tree root down to fileID (inclusive), caching
+    results so shared ancestors are only walked once across all files.
+    """
+    global _path_prefix_source
+    if _path_prefix_source is not fileDIC:
+        _path_prefix_cache.clear()
+        _path_prefix_source = fileDIC
+    cached = _path_prefix_cache.get(fileID)
+    if cached is not None:
+        return cached
+    parts = []
+    current = fileID
+    while current is not None:
+        entry = fileDIC.get(current)
+        if entry is None:
+            break
+        parts.append(entry['Name'])
+        current = entry['Parent']
+        if current in _path_prefix_cache:
+            parts.append(_path_prefix_cache[current])
+            break
+    path = '/'.join(reversed(parts))
+    _path_prefix_cache[fileID] = path
+    return path
+
 def findTree(fileID, name, parent):
     """
     Finds the original file path for a given file ID, name, and parent.
+    Uses the memoized ancestor prefix so building paths for N files costs
+    O(N) total instead of O(N * depth).
     Parameters:
         fileID (int): The ID of the file.
         name (str): The name of the file.
         parent (str): The parent directory of the file.
     Returns: str: The original file path.
     """
-    path = fileDIC[parent]['Name'] + "/" + name
-    current_parent = parent
-    while current_parent is not None and hasAnotherParent(current_parent):
-        current_parent = findNextParent(current_parent)
-        path = fileDIC[current_parent]['Name'] + '/' + path
-    return path
+    return _path_prefix(parent) + "/" + name
 
 def idToPath2(fileID):
     """
     Converts a file ID into its original path by traversing the fileDIC dictionary and reconstructing the path.
+    Delegates to the iterative, memoized ancestor walk so repeated lookups
+    that share ancestors reuse cached prefixes instead of re-walking the
+    chain (and re-concatenating strings) per file.
     Args: fileID (int): The ID of the file.
     Returns: str: The original path of the file.
     """
-    value = fileDIC[fileID]
-    if value['Parent'] != None:
-        path = findTree(fileID, value['Name'], value['Parent'])
-    else:
-        path = fileDIC[fileID]['Name']
-    return path
+    fileDIC[fileID]  # preserve KeyError for unknown ids
+    return _path_prefix(fileID)
 
 # Reverse lookup dictionaries for O(1) filename->ID mapping (built after fileDIC is populated)
 _contentID_to_fileID = {}
@@ -416,15 +634,18 @@ def build_reverse_lookups():
     Must be called after fileDIC is populated.
     """
     global _contentID_to_fileID, _name_to_fileID
-    _contentID_to_fileID = {}
-    _name_to_fileID = {}
-    for file_id, meta in fileDIC.items():
-        cid = meta.get('contentID')
+    # Dict comprehensions run the loop at C level - much faster than
+    # per-item assignment for the multi-million-row dictionaries we see.
+    items = fileDIC.items()
+    _contentID_to_fileID = {meta['contentID']: file_id for file_id, meta in items if meta.get('contentID')}
+    # Names are not unique across directories, so map each name to the list
+    # of ids carrying it instead of silently keeping only the last one.
+    name_map = {}
+    for file_id, meta in items:
         name = meta.get('Name')
-        if cid:
-            _contentID_to_fileID[cid] = file_id
         if name:
-            _name_to_fileID[name] = file_id
+            name_map.setdefault(name, []).append(file_id)
+    _name_to_fileID = name_map
     logging.info(f"Built reverse lookups: {len(_contentID_to_fileID)} contentIDs, {len(_name_to_fileID)} names")
 
 def filenameToID(filename):
@@ -439,27 +660,51 @@ def filenameToID(filename):
     file_id = _contentID_to_fileID.get(filename)
     if file_id is not None:
         return str(file_id)
-    file_id = _name_to_fileID.get(filename)
-    if file_id is not None:
-        return str(file_id)
+    # Name lookup maps to a list of ids (names are not unique). The old
+    # dict build overwrote on duplicates, so the last id in fileDIC order
+    # won; return the last entry to keep that resolution.
+    ids = _name_to_fileID.get(filename)
+    if ids:
+        return str(ids[-1])
     return None
 
+def make_src_resolver(base_dir):
+    """
+    Return a resolver specialized for one source root. The root and path
+    prefixes are bound once here, so the per-call work on the resume hot
+    path is just string concatenation plus a single stat probe.
+    """
+    sep = os.sep
+    flat_prefix = base_dir.rstrip(sep) + sep if base_dir else base_dir
+
+    def resolve(cid):
+        if not cid:
+            return base_dir
+        flat = flat_prefix + cid
+        # Probe with os.stat instead of os.path.exists so the common
+        # flat-layout hit costs a single syscall; only fall back to the
+        # sharded layout when the flat path is missing.
+        try:
+            os.stat(flat)
+            return flat
+        except OSError:
+            pass
+        sharded = flat_prefix + cid[0] + sep + cid
+        try:
+            os.stat(sharded)
+            return sharded
+        except OSError:
+            pass
+        return flat
+
+    return resolve
+
 def resolve_src_path(base_dir, cid):
     """
     Return the most likely source path for a contentID, trying flat and
     first-character subdir layouts common on MyCloud dumps.
     """
-    candidates = []
-    if cid:
-        candidates.append(os.path.join(base_dir, cid))
-        if len(cid) > 0:
-            candidates.append(os.path.join(base_dir, cid[0], cid))
-    else:
-        candidates.append(base_dir)
-    for cand in candidates:
-        if os.path.exists(cand):
-            return cand
-    return candidates[0]
+    return make_src_resolver(base_dir)(cid)
 
 def getRootDirs():
     """
@@ -471,145 +716,353 @@ def getRootDirs():
         if 'auth' in values['Name'] and '|' in values['Name']:
             return str(values['Name'])
         
-def copy_file(root, file, skipnames, dumpdir, dry_run, log_file, disk_semaphore=None, io_buffer_size=0, db_path=None):
-    # Use provided db_path or fall back to global db
-    _db = db_path if db_path else globals().get('db')
-    filename = str(file)
-    print('FOUND FILE ' + filename + ' SEARCHING......', end="\n")
-    print('Processing ' + str(processed_files_counter.value) + ' of ' + str(total_files) + ' files', end="\n")
-    fileID = filenameToID(str(file))
-    fullpath = None
-    if fileID is not None:
-        fullpath = idToPath2(fileID)
-    if fullpath is not None:
-        newpath = None
-        for paths in skipnames:
-            newpath = fullpath.replace(paths, '')
-        if newpath is not None:
-            newpath = os.path.join(dumpdir, newpath.lstrip(os.sep))
-            if args.sanitize_pipes:
-                newpath = newpath.replace("|", "-")
-        fullpath = str(os.path.join(root, file))
-
-        if newpath in copied_files:
-            print('File ' + fullpath + ' exists in ' + log_file + ', thus copied in a previous run to avoid duplication, skipping')
-            logging.info(f'File {fullpath} exists in {log_file}, thus copied in a previous run to avoid duplication, skipping')
-            with skipped_files_counter.get_lock():
-                skipped_files_counter.value += 1
-            with processed_files_counter.get_lock():
-                processed_files_counter.value += 1
-            progress = (processed_files_counter.value / total_files) * 100
-            print(f'Progress: {progress:.2f}%')
-            return
-        elif os.path.exists(newpath):
-            if args.refresh_mtime_existing and args.preserve_mtime:
-                meta = fileDIC.get(fileID, {})
-                ts = next(
-                    (
-                        t
-                        for t in [
-                            meta.get("imageDate"),
-                            meta.get("videoDate"),
-                            meta.get("cTime"),
-                            meta.get("birthTime"),
-                        ]
-                        if isinstance(t, (int, float)) and t is not None
-                    ),
-                    None,
-                )
-                if ts:
-                    os.utime(newpath, (ts / 1000, ts / 1000))
-            with skipped_files_counter.get_lock():
-                skipped_files_counter.value += 1
-            with processed_files_counter.get_lock():
-                processed_files_counter.value += 1
-            progress = (processed_files_counter.value / total_files) * 100
-            print(f'Progress: {progress:.2f}%')
-            return
-        else:
-            if dry_run:
-                print('Dry run: Skipping copying ' + fullpath + ' to ' + newpath)
-                with processed_files_counter.get_lock():
-                    processed_files_counter.value += 1
-                progress = (processed_files_counter.value / total_files) * 100
-                with copied_files_counter.get_lock():
-                    copied_files_counter.value += 1
+# Chunk size for the userspace fallback copy loop.
+_COPY_CHUNK = 1 << 20
+
+# Per-thread preallocated copy buffer: the fallback loops read into the
+# same memoryview instead of allocating a fresh bytes object per chunk.
+_copy_buffers = threading.local()
+
+def _get_copy_buffer(size=_COPY_CHUNK):
+    """Return this thread's reusable copy buffer, at least size bytes."""
+    mv = getattr(_copy_buffers, 'mv', None)
+    if mv is None or len(mv) < size:
+        _copy_buffers.mv = mv = memoryview(bytearray(size))
+    return mv
+
+def _copy_fd_data(fd_in, fd_out, size):
+    """
+    Move size bytes from fd_in to fd_out, preferring in-kernel copies.
+    Tries os.copy_file_range (Linux >= 4.5), then os.sendfile, and finally
+    a plain read/write loop, mirroring CPython's shutil fast-copy ladder.
+    """
+    offset = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while offset < size:
+                sent = os.copy_file_range(fd_in, fd_out, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+            if offset >= size:
+                return
+        except OSError as e:
+            # Only fall through for "not supported here" errors before any
+            # data moved; anything else is a real copy failure.
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL) or offset:
+                raise
+    if hasattr(os, "sendfile"):
+        try:
+            while offset < size:
+                sent = os.sendfile(fd_out, fd_in, offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+            if offset >= size:
+                return
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL) or offset:
+                raise
+    os.lseek(fd_in, offset, os.SEEK_SET)
+    mv = _get_copy_buffer()
+    while True:
+        n = os.readv(fd_in, [mv])
+        if not n:
+            break
+        os.write(fd_out, mv[:n])
+
+def _fast_copyfile(src, dst):
+    """
+    Copy src to dst with kernel-side data movement where available, then
+    preserve mode and timestamps in one stat/utime/chmod pass. Drop-in for
+    shutil.copy2 on the copy hot path; avoids the kernel<->userspace bounce
+    (one full memcpy per byte) that copy2's read/write loop pays.
+    """
+    st = os.stat(src)
+    fd_in = os.open(src, os.O_RDONLY)
+    try:
+        fd_out = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        try:
+            _copy_fd_data(fd_in, fd_out, st.st_size)
+        finally:
+            os.close(fd_out)
+    finally:
+        os.close(fd_in)
+    os.utime(dst, (st.st_atime, st.st_mtime))
+    os.chmod(dst, st.st_mode & 0o7777)
+
+# Cached O_APPEND descriptors for the per-worker copy logs, keyed by
+# (pid, path) so a forked child never reuses the parent's fd entry.
+_log_fd_cache = {}
+
+def _append_log(log_path, line):
+    """
+    Append one line to log_path through a cached O_APPEND fd. Saves the
+    open/close syscall pair (and TextIOWrapper setup) per logged file;
+    O_APPEND keeps concurrent appends from interleaving mid-line.
+    """
+    key = (os.getpid(), log_path)
+    fd = _log_fd_cache.get(key)
+    if fd is None:
+        fd = os.open(log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_CLOEXEC, 0o644)
+        _log_fd_cache[key] = fd
+    os.write(fd, (line + '\n').encode('utf-8', 'surrogatepass'))
+
+def _close_log_fds():
+    """Close cached log descriptors (registered atexit, callable in tests)."""
+    while _log_fd_cache:
+        _, fd = _log_fd_cache.popitem()
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
+atexit.register(_close_log_fds)
+
+# Forbidden-character sanitize table. str.translate is one C-level pass
+# regardless of table size, so extending this for more characters later
+# does not add per-file passes.
+_SANITIZE_TRANS = str.maketrans({"|": "-"})
+
+class ThreadSafeCounter:
+    """
+    Thread-native drop-in for multiprocessing.Value('i', 0). The copy
+    workers run as threads in one address space, so a plain int behind a
+    threading.Lock avoids the shared-memory segment and ctypes proxy
+    overhead. Exposes .value and get_lock() so call sites are unchanged.
+    """
+    __slots__ = ('value', '_lock')
+
+    def __init__(self, initial=0):
+        self.value = initial
+        self._lock = threading.Lock()
+
+    def get_lock(self):
+        return self._lock
+
+# Destination paths that existed before the pool started. copy_file checks
+# this in-memory set first so the common "already exists" case costs a hash
+# lookup instead of a stat syscall per candidate file.
+_existing_dest = frozenset()
+
+def _prescan_destination(dumpdir):
+    """
+    Walk dumpdir once with os.scandir and return a frozenset of every file
+    path under it. Built before the worker pool starts; workers inherit it
+    via fork copy-on-write.
+    """
+    paths = []
+    stack = [dumpdir]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        paths.append(entry.path)
+        except OSError:
+            continue
+    return frozenset(paths)
+
+_CURRENT_COPY = None
+
+def make_copy_file():
+    """
+    Build a copy worker with the current module globals bound as locals.
+
+    copy_file reads args, fileDIC, the progress counters, and the lookup
+    helpers on every call; each access through LOAD_GLOBAL costs a module
+    dict probe. Binding them once per run turns those into closure loads.
+    Set _CURRENT_COPY to None to rebuild after swapping any of them.
+    """
+    _args = args
+    _fileDIC = fileDIC
+    _copied_files = copied_files
+    _processed = processed_files_counter
+    _copied_counter = copied_files_counter
+    _skipped = skipped_files_counter
+    _total_files = total_files
+    _existing = _existing_dest
+    _filenameToID = filenameToID
+    _idToPath2 = idToPath2
+
+    def _copy_file_impl(root, file, skipnames, dumpdir, dry_run, log_file, disk_semaphore=None, io_buffer_size=0, db_path=None, _skip_prefixes=None):
+        # Use provided db_path or fall back to global db
+        _db = db_path if db_path else globals().get('db')
+        filename = str(file)
+        print('FOUND FILE ' + filename + ' SEARCHING......', end="\n")
+        print('Processing ' + str(_processed.value) + ' of ' + str(_total_files) + ' files', end="\n")
+        fileID = _filenameToID(str(file))
+        fullpath = None
+        if fileID is not None:
+            fullpath = _idToPath2(fileID)
+        if fullpath is not None:
+            # Strip the skip-root prefix with one C-level startswith over a
+            # precomputed tuple instead of a Python-level replace per skipname
+            # (the old loop also kept only the last skipname's result).
+            # Callers on the hot path pass _skip_prefixes computed once.
+            if _skip_prefixes is None:
+                _skip_prefixes = tuple(n if n.endswith('/') else n + '/' for n in skipnames)
+            newpath = fullpath
+            if _skip_prefixes and newpath.startswith(_skip_prefixes):
+                for prefix in _skip_prefixes:
+                    if newpath.startswith(prefix):
+                        newpath = newpath[len(prefix):]
+                        break
+            if newpath is not None:
+                # Plain concatenation: both pieces are known relative/normalized,
+                # so os.path.join's absolute-path override logic is dead weight
+                # on this per-file path.
+                newpath = dumpdir.rstrip(os.sep) + os.sep + newpath.lstrip(os.sep)
+                if _args.sanitize_pipes:
+                    newpath = newpath.translate(_SANITIZE_TRANS)
+            fullpath = str(os.path.join(root, file))
+
+            if newpath in _copied_files:
+                print('File ' + fullpath + ' exists in ' + log_file + ', thus copied in a previous run to avoid duplication, skipping')
+                logging.info(f'File {fullpath} exists in {log_file}, thus copied in a previous run to avoid duplication, skipping')
+                with _skipped.get_lock():
+                    _skipped.value += 1
+                with _processed.get_lock():
+                    _processed.value += 1
+                progress = (_processed.value / _total_files) * 100
+                print(f'Progress: {progress:.2f}%')
+                return
+            elif newpath in _existing or os.path.exists(newpath):
+                if _args.refresh_mtime_existing and _args.preserve_mtime:
+                    meta = _fileDIC.get(fileID, {})
+                    ts = next(
+                        (
+                            t
+                            for t in [
+                                meta.get("imageDate"),
+                                meta.get("videoDate"),
+                                meta.get("cTime"),
+                                meta.get("birthTime"),
+                            ]
+                            if isinstance(t, (int, float)) and t is not None
+                        ),
+                        None,
+                    )
+                    if ts:
+                        os.utime(newpath, (ts / 1000, ts / 1000))
+                with _skipped.get_lock():
+                    _skipped.value += 1
+                with _processed.get_lock():
+                    _processed.value += 1
+                progress = (_processed.value / _total_files) * 100
                 print(f'Progress: {progress:.2f}%')
                 return
             else:
-                print('Copying ' + newpath)
-                try:
-                    os.makedirs(os.path.dirname(newpath), exist_ok=True)
-                    # Keep two FDs per copy (src/dest) to stay under limits.
-                    if io_buffer_size and io_buffer_size > 0:
-                        with open(fullpath, "rb") as fsrc, open(newpath, "wb") as fdst:
-                            while True:
-                                buf = fsrc.read(io_buffer_size)
-                                if not buf:
-                                    break
-                                fdst.write(buf)
-                    else:
-                        shutil.copy2(fullpath, newpath)
-                    if args.preserve_mtime:
-                        meta = fileDIC.get(fileID, {})
-                        ts = next(
-                            (
-                                t
-                                for t in [
-                                    meta.get("imageDate"),
-                                    meta.get("videoDate"),
-                                    meta.get("cTime"),
-                                    meta.get("birthTime"),
-                                ]
-                                if isinstance(t, (int, float)) and t is not None
-                            ),
-                            None,
-                        )
-                        if ts:
-                            os.utime(newpath, (ts / 1000, ts / 1000))
-                            if _db:
-                                try:
-                                    def _op():
-                                        with sqlite3.connect(_db) as conn:
-                                            conn.execute("PRAGMA busy_timeout=5000")
-                                            cur = conn.cursor()
-                                            cur.execute("UPDATE copied_files SET mtime_refreshed=1 WHERE file_id=?", (fileID,))
-                                            conn.commit()
-                                    with_retry_db(_op)
-                                except sqlite3.Error:
-                                    pass
-                    with processed_files_counter.get_lock():
-                        processed_files_counter.value += 1
-                    progress = (processed_files_counter.value / total_files) * 100
-                    with copied_files_counter.get_lock():
-                        copied_files_counter.value += 1
+                if dry_run:
+                    print('Dry run: Skipping copying ' + fullpath + ' to ' + newpath)
+                    with _processed.get_lock():
+                        _processed.value += 1
+                    progress = (_processed.value / _total_files) * 100
+                    with _copied_counter.get_lock():
+                        _copied_counter.value += 1
                     print(f'Progress: {progress:.2f}%')
-                    with lock:
-                        with open(log_file, 'a') as f:
-                            f.write(newpath + '\n')  # Write destination path to match what we check
-                    # Record in database for resume capability (store content_id for consistency)
-                    if _db:
-                        content_id = fileDIC.get(fileID, {}).get("contentID", filename)
-                        insert_copied_file(_db, fileID, content_id)
-                except Exception as e:
-                    print(f'Error copying file {fullpath} to {newpath}: {e}')
-                    logging.error(f'Error copying file {fullpath} to {newpath}: {e}')
-                    # Record as skipped so we don't retry forever on permanent errors (use content_id for consistency)
-                    if _db:
-                        content_id = fileDIC.get(fileID, {}).get("contentID", filename)
-                        insert_skipped_file(_db, content_id, f'copy_error: {type(e).__name__}')
-    else:
-        print(f'Warning: Unable to find file {filename} in the database')
-        logging.warning(f'Unable to find file {filename} in the database')
-        if _db:
-            insert_skipped_file(_db, filename, 'not_in_database')
-        with processed_files_counter.get_lock():
-            processed_files_counter.value += 1
-        progress = (processed_files_counter.value / total_files) * 100
-        with skipped_files_counter.get_lock():
-            skipped_files_counter.value += 1
-        print(f'Progress: {progress:.2f}%')
-                    
+                    return
+                else:
+                    print('Copying ' + newpath)
+                    try:
+                        os.makedirs(os.path.dirname(newpath), exist_ok=True)
+                        # Keep two FDs per copy (src/dest) to stay under limits.
+                        if io_buffer_size and io_buffer_size > 0:
+                            # readinto the thread's reusable buffer: no per-chunk
+                            # bytes allocation, sliced to honor the caller's size
+                            mv = _get_copy_buffer(io_buffer_size)[:io_buffer_size]
+                            with open(fullpath, "rb") as fsrc, open(newpath, "wb") as fdst:
+                                while True:
+                                    n = fsrc.readinto(mv)
+                                    if not n:
+                                        break
+                                    fdst.write(mv[:n])
+                        else:
+                            _fast_copyfile(fullpath, newpath)
+                        if _args.preserve_mtime:
+                            meta = _fileDIC.get(fileID, {})
+                            ts = next(
+                                (
+                                    t
+                                    for t in [
+                                        meta.get("imageDate"),
+                                        meta.get("videoDate"),
+                                        meta.get("cTime"),
+                                        meta.get("birthTime"),
+                                    ]
+                                    if isinstance(t, (int, float)) and t is not None
+                                ),
+                                None,
+                            )
+                            if ts:
+                                os.utime(newpath, (ts / 1000, ts / 1000))
+                                if _db:
+                                    try:
+                                        def _op():
+                                            with sqlite3.connect(_db) as conn:
+                                                conn.execute("PRAGMA busy_timeout=5000")
+                                                cur = conn.cursor()
+                                                cur.execute("UPDATE copied_files SET mtime_refreshed=1 WHERE file_id=?", (fileID,))
+                                                conn.commit()
+                                        with_retry_db(_op)
+                                    except sqlite3.Error:
+                                        pass
+                        with _processed.get_lock():
+                            _processed.value += 1
+                        progress = (_processed.value / _total_files) * 100
+                        with _copied_counter.get_lock():
+                            _copied_counter.value += 1
+                        print(f'Progress: {progress:.2f}%')
+                        # Worker threads share this process's single .<pid> log
+                        # partition through a cached O_APPEND fd (no open/close
+                        # pair per file; O_APPEND keeps concurrent appends
+                        # whole). merge_worker_logs folds it back into log_file
+                        # at the end of the run, and the pid suffix keeps a
+                        # crashed run's leftovers from clobbering the main log.
+                        _append_log(f'{log_file}.{os.getpid()}', newpath)  # Write destination path to match what we check
+                        # Record in database for resume capability (store content_id for consistency)
+                        if _db:
+                            content_id = _fileDIC.get(fileID, {}).get("contentID", filename)
+                            _copied_buffer.append((str(fileID), str(content_id), newpath))
+                            _flush_tracking(_db)
+                    except Exception as e:
+                        print(f'Error copying file {fullpath} to {newpath}: {e}')
+                        logging.error(f'Error copying file {fullpath} to {newpath}: {e}')
+                        # Record as skipped so we don't retry forever on permanent errors (use content_id for consistency)
+                        if _db:
+                            content_id = _fileDIC.get(fileID, {}).get("contentID", filename)
+                            _skip_buffer.append((str(content_id), f'copy_error: {type(e).__name__}'))
+                            _flush_tracking(_db)
+        else:
+            print(f'Warning: Unable to find file {filename} in the database')
+            logging.warning(f'Unable to find file {filename} in the database')
+            if _db:
+                _skip_buffer.append((str(filename), 'not_in_database'))
+                _flush_tracking(_db)
+            with _processed.get_lock():
+                _processed.value += 1
+            progress = (_processed.value / _total_files) * 100
+            with _skipped.get_lock():
+                _skipped.value += 1
+            print(f'Progress: {progress:.2f}%')
+
+    return _copy_file_impl
+
+def copy_file(root, file, skipnames, dumpdir, dry_run, log_file, disk_semaphore=None, io_buffer_size=0, db_path=None, _skip_prefixes=None):
+    """
+    Thin dispatcher to the specialized per-run implementation. The closure
+    is built lazily on first call so it captures whatever globals are in
+    place at that point (the drivers and test fixtures set them up first).
+    """
+    global _CURRENT_COPY
+    if _CURRENT_COPY is None:
+        _CURRENT_COPY = make_copy_file()
+    return _CURRENT_COPY(root, file, skipnames, dumpdir, dry_run, log_file,
+                         disk_semaphore=disk_semaphore, io_buffer_size=io_buffer_size,
+                         db_path=db_path, _skip_prefixes=_skip_prefixes)
+
 def create_log_file_from_dir(root_dir, log_file):
     """
     Regenerate the log file by scanning the destination directory and writing all found files to the log.
@@ -618,13 +1071,67 @@ def create_log_file_from_dir(root_dir, log_file):
         log_file (str): The path to the log file to be created.
     """
     tmp_log = log_file + ".tmp"
-    with open(tmp_log, 'w') as f:
-        for root, dirs, files in os.walk(root_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                f.write(file_path + '\n')
+    # Walk with os.scandir so type checks come from the cached DirEntry
+    # instead of a stat per name, then write the whole list in one call
+    # rather than one buffered write per file.
+    paths = []
+    stack = [root_dir]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        paths.append(entry.path)
+        except OSError:
+            continue
+    with open(tmp_log, 'w', buffering=1 << 20) as f:
+        if paths:
+            f.write('\n'.join(paths))
+            f.write('\n')
     os.replace(tmp_log, log_file)
 
+def merge_worker_logs(log_file):
+    """
+    Fold per-worker log partitions (log_file.<pid>) back into log_file.
+    Workers append to their own partition during a run so the copy hot path
+    never contends on a shared lock; this merge runs once at end of run.
+    Returns the number of partitions merged.
+    """
+    directory = os.path.dirname(log_file) or '.'
+    prefix = os.path.basename(log_file) + '.'
+    partitions = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                suffix = entry.name[len(prefix):]
+                if (entry.name.startswith(prefix) and suffix.isdigit()
+                        and entry.is_file(follow_symlinks=False)):
+                    partitions.append(entry.path)
+    except OSError:
+        return 0
+    partitions.sort()
+    # Drop this process's cached append fds for the partitions being
+    # merged, so later appends reopen fresh files instead of writing to
+    # the unlinked inodes.
+    for part in partitions:
+        fd = _log_fd_cache.pop((os.getpid(), part), None)
+        if fd is not None:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+    merged = 0
+    if partitions:
+        with open(log_file, 'ab') as out:
+            for part in partitions:
+                with open(part, 'rb') as src:
+                    shutil.copyfileobj(src, out, 1 << 20)
+                os.remove(part)
+                merged += 1
+    return merged
+
 def get_dir_size(start_path='.'):
     """
     Calculate the total size of a directory and its subdirectories.
@@ -671,41 +1178,62 @@ def count_files(start_path='.'):
     return total
 
 def get_directory_summary(path):
-    """Return (file_count, total_size) for all files under path."""
+    """
+    Return (file_count, total_size) for all files under path.
+    Walks with os.scandir so type checks and sizes come from the cached
+    DirEntry stat instead of a separate stat syscall per file.
+    """
     total_size = 0
     file_count = 0
-    
-    for root, _, files in os.walk(path):
-        for f in files:
-            try:
-                fp = os.path.join(root, f)
-                if os.path.islink(fp):
-                    continue
-                total_size += os.path.getsize(fp)
-                file_count += 1
-            except (OSError, FileNotFoundError):
-                continue
-                
+
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            total_size += entry.stat(follow_symlinks=False).st_size
+                            file_count += 1
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
     return file_count, total_size
 
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+
 def format_size(size_bytes):
     """Convert bytes to human-readable format."""
-    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+    if isinstance(size_bytes, int) and size_bytes > 0:
+        # Integer fast path: derive the unit straight from the bit length
+        # instead of dividing in a loop (this runs per file in reporting).
+        index = min((size_bytes.bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+        return f"{size_bytes / (1 << (10 * index)):.2f} {_SIZE_UNITS[index]}"
+    for unit in _SIZE_UNITS[:-1]:
         if size_bytes < 1024.0:
             return f"{size_bytes:.2f} {unit}"
         size_bytes /= 1024.0
     return f"{size_bytes:.2f} PB"
 
 def log_summary(message, to_console=True, to_file=True):
-    """Log a message to both console and log file with timestamp."""
+    """
+    Log a message to both console and log file with timestamp.
+    The file write goes through the log queue so callers on the copy hot
+    path never block on the summary file; the log_worker thread owns the
+    file handle and drains the queue in the background.
+    """
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     log_message = f"[{timestamp}] {message}"
-    
+
     if to_console:
         print(log_message)
     if to_file:
-        with open(log_filename, 'a') as f:
-            f.write(log_message + '\n')
+        log_queue.put(log_message)
 
 def show_summary(db_path, source_dir, dest_dir, phase="INITIAL"):
     """
@@ -736,12 +1264,27 @@ def show_summary(db_path, source_dir, dest_dir, phase="INITIAL"):
     add_line(f"  Path: {source_dir}")
     
     try:
-        # Get total files from database
+        # Get totals from database in one round-trip; fall back to the
+        # plain Files count for databases without the tracking tables.
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM Files")
-        db_file_count = cursor.fetchone()[0]
+        try:
+            cursor.execute(
+                """
+                SELECT (SELECT COUNT(*) FROM Files),
+                       (SELECT COUNT(*) FROM copied_files),
+                       (SELECT COUNT(*) FROM skipped_files)
+                """
+            )
+            db_file_count, tracked_copied, tracked_skipped = cursor.fetchone()
+        except sqlite3.OperationalError:
+            cursor.execute("SELECT COUNT(*) FROM Files")
+            db_file_count = cursor.fetchone()[0]
+            tracked_copied = tracked_skipped = None
         add_line(f"  Files in database: {db_file_count:,}")
+        if tracked_copied is not None:
+            add_line(f"  Tracked as copied: {tracked_copied:,}")
+            add_line(f"  Tracked as skipped: {tracked_skipped:,}")
         
         # Get actual source files count and size
         add_line("  Scanning source directory (this may take a while)...")
@@ -810,8 +1353,12 @@ def setup_logging():
     log_summary(f"Working directory: {os.getcwd()}")
     log_summary("-" * 70)
 
-if __name__ == "__main__":
-    # Parse arguments first
+def build_parser():
+    """Build the command-line argument parser.
+
+    Kept at module level so tests can inspect flags and help text without
+    spawning a subprocess.
+    """
     parser = argparse.ArgumentParser(description="WD MyCloud REST SDK Recovery Tool")
     parser.add_argument("--preflight", action="store_true", help="Run pre-flight hardware/file check and print recommendations")
     parser.add_argument("--dry_run", action="store_true", default=False, help="Perform a dry run")
@@ -864,8 +1411,13 @@ if __name__ == "__main__":
         default=0,
         help="Process only the first N files (for testing). 0 = no limit (default).",
     )
-    args = parser.parse_args()
-    
+    return parser
+
+
+if __name__ == "__main__":
+    # Parse arguments first
+    args = build_parser().parse_args()
+
     # Initialize start time and logging
     start_time = time.time()
     setup_logging()
@@ -1035,19 +1587,27 @@ if __name__ == "__main__":
         skipnames.append(root_dir_name)
 
     total_files = sum([len(files) for _, _, files in os.walk(filedir)])
-    processed_files_counter = Value("i", 0)
-    copied_files_counter = Value("i", 0)
-    skipped_files_counter = Value("i", 0)
+    # Workers are threads (the ThreadPoolExecutor pools below), so plain
+    # lock-guarded ints beat multiprocessing shared memory here.
+    processed_files_counter = ThreadSafeCounter()
+    copied_files_counter = ThreadSafeCounter()
+    skipped_files_counter = ThreadSafeCounter()
 
-    copied_files = set()
+    copied_files = _CopiedSet(db_path=db, expected=max(total_files, 1))
     if os.path.exists(log_file):
         with open(log_file, "r") as f:
-            copied_files = set(f.read().splitlines())
+            copied_files.update(f.read().splitlines())
 
     logging.info(f"Parameters: db={db}, filedir={filedir}, dumpdir={dumpdir}, dry_run={dry_run}, log_file={log_file}, create_log={args.create_log}, resume={args.resume}, thread_count={thread_count}")
 
     def run_standard_copy():
+        global _existing_dest, _CURRENT_COPY
         copy_phase_start = time.time()
+        # One walk of the destination up front replaces a stat per source
+        # file inside the workers with an in-memory set lookup.
+        _existing_dest = _prescan_destination(dumpdir)
+        # Rebuild the specialized copy closure against this run's globals
+        _CURRENT_COPY = None
         print(f"There are {total_files} files to copy from {filedir} to {dumpdir}")
         logging.info(f"There are {total_files} files to copy from {filedir} to {dumpdir}")
         print(f"There are {num_db_rows} rows in the database to process")
@@ -1071,6 +1631,9 @@ if __name__ == "__main__":
             print(msg)
             logging.info(msg)
 
+        # Computed once here rather than per submitted file
+        skip_prefixes = tuple(n if n.endswith('/') else n + '/' for n in skipnames)
+
         with ThreadPoolExecutor(max_workers=thread_count) as executor:
             for root, dirs, files in os.walk(filedir):
                 for file in files:
@@ -1078,15 +1641,20 @@ if __name__ == "__main__":
                     if args.limit > 0 and processed_files_counter.value >= args.limit:
                         print(f"\n⚠️  Reached --limit of {args.limit} files. Stopping...")
                         logging.info(f"Reached --limit of {args.limit} files. Stopping...")
+                        executor.shutdown(wait=True)
+                        merge_worker_logs(log_file)
                         return  # Exit early
                     
-                    executor.submit(copy_file, root, file, skipnames, dumpdir, dry_run, log_file)
+                    executor.submit(copy_file, root, file, skipnames, dumpdir, dry_run, log_file,
+                                    _skip_prefixes=skip_prefixes)
                     processed = processed_files_counter.value
                     percent = int((processed / total_files) * 100) if total_files else 100
                     if percent > last_logged_percent:
                         last_logged_percent = percent
                         log_progress()
 
+        merge_worker_logs(log_file)
+
         dumpdir_size = get_dir_size(dumpdir) / (1024 * 1024 * 1024)
         print(f"The size of the source directory {filedir} is {filedir_size:.2f} GB")
         print(f"The size of the destination directory {dumpdir} is {dumpdir_size:.2f} GB")
@@ -1197,6 +1765,10 @@ if __name__ == "__main__":
         # Semaphore to limit concurrent file operations and prevent FD exhaustion
         io_semaphore = threading.Semaphore(max(2, thread_count))
 
+        # Bind the source root once; workers then resolve with string
+        # concatenation plus one stat instead of rebuilding candidates.
+        resolve_src = make_src_resolver(filedir)
+
         def copy_worker(file_row):
             file_id, content_id, name, image_date, video_date, c_time, birth_time, mime_type = file_row
             try:
@@ -1215,11 +1787,11 @@ if __name__ == "__main__":
                 for skip in skipnames:
                     rel_path = rel_path.replace(skip, "")
                 if args.sanitize_pipes:
-                    rel_path = rel_path.replace("|", "-")
+                    rel_path = rel_path.translate(_SANITIZE_TRANS)
                 # Strip leading slashes so os.path.join works correctly
                 rel_path = rel_path.lstrip(os.sep)
                 dest_path = os.path.join(dumpdir, rel_path)
-                src_path = resolve_src_path(filedir, content_id)
+                src_path = resolve_src(content_id)
                 if not os.path.exists(src_path):
                     msg = f"Source missing: {content_id} resolved to {src_path}"
                     print(f"[ERROR] {msg}")
@@ -1248,7 +1820,7 @@ if __name__ == "__main__":
                             except sqlite3.Error:
                                 pass
                     # Record in copied_files since it exists at destination
-                    insert_copied_file(db, file_id, content_id)
+                    insert_copied_file(db, file_id, content_id, dest_path)
                     return ("skipped_already", content_id)
                 # Use semaphore to limit concurrent file operations
                 with io_semaphore:
@@ -1264,7 +1836,7 @@ if __name__ == "__main__":
                     )
                     if ts:
                         os.utime(dest_path, (ts / 1000, ts / 1000))  # convert ms to seconds
-                insert_copied_file(db, file_id, content_id)
+                insert_copied_file(db, file_id, content_id, dest_path)
                 print(f"[COPIED] {rel_path}")
                 logging.info(f"Copied: {rel_path}")
                 return ("copied", rel_path)
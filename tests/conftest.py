@@ -1,10 +1,32 @@
 import os
+import shutil
 import sqlite3
+import sys
 import tempfile
 from pathlib import Path
 
 import pytest
 
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# restsdk_public opens its summary_<timestamp>.log as soon as it is imported;
+# send it to the system temp dir so test runs don't litter the repository.
+os.environ.setdefault("RESTSDK_SUMMARY_DIR", tempfile.gettempdir())
+
+
+@pytest.fixture(scope="session")
+def restsdk_module():
+    """Import restsdk_public once per session for structure checks.
+
+    Several tests only need to look at the imported module's namespace;
+    sharing one import keeps them from re-paying module init (log worker
+    thread, argparse setup) per test.
+    """
+    sys.path.insert(0, REPO_ROOT)
+    import restsdk_public
+    return restsdk_public
+
+
 @pytest.fixture(autouse=True)
 def cleanup_db_connections():
     """Clean up thread-local database connections after each test."""
@@ -16,6 +38,27 @@ def cleanup_db_connections():
     except ImportError:
         pass
 
+def pytest_configure(config):
+    # Route tmp_path to tmpfs when the host has one, so the file-heavy
+    # tests hit RAM instead of disk. An explicit --basetemp still wins,
+    # and xdist workers arrive with basetemp already set by the controller.
+    # The pid keeps concurrent sessions apart: pytest clears basetemp at
+    # startup, so a shared path would let one session delete another's
+    # live tmp dirs mid-run.
+    if config.option.basetemp is None and os.path.isdir("/dev/shm"):
+        config.option.basetemp = "/dev/shm/pytest-%d-%d" % (os.getuid(), os.getpid())
+        config._shm_basetemp = config.option.basetemp
+
+
+def pytest_sessionfinish(session):
+    # Remove the per-session tree the hook above created; tmpfs is shared
+    # RAM, so leaked trees accumulate until /dev/shm fills up. Only set on
+    # the controller, so xdist workers skip it.
+    basetemp = getattr(session.config, "_shm_basetemp", None)
+    if basetemp:
+        shutil.rmtree(basetemp, ignore_errors=True)
+
+
 # Default perf size; can be overridden via PERF_TEST_ROWS env var
 def pytest_addoption(parser):
     parser.addoption(
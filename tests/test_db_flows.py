@@ -258,6 +258,8 @@ def test_refresh_mtime_existing(tmp_path, monkeypatch):
     restsdk_public.copied_files = set()
     # Build reverse lookup dictionaries for O(1) filename->ID mapping
     restsdk_public.build_reverse_lookups()
+    # Rebuild the copy closure against the globals set above
+    restsdk_public._CURRENT_COPY = None
 
     src_dir = tmp_path / "src"
     dest_dir = tmp_path / "dest"
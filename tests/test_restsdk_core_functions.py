@@ -212,9 +212,11 @@ class TestDirectoryOperations:
     
     def test_count_files_flat_directory(self, tmp_path):
         """Test counting files in flat directory."""
-        # Create some files
+        # Create some files (str paths avoid per-iteration Path construction)
+        base = str(tmp_path)
         for i in range(5):
-            (tmp_path / f"file{i}.txt").write_text("content")
+            with open(os.path.join(base, f"file{i}.txt"), "w") as f:
+                f.write("content")
         
         assert count_files(str(tmp_path)) == 5
     
@@ -331,47 +333,53 @@ class TestFormatSize:
         assert format_size(1024 ** 5 * 3.75) == "3.75 PB"
 
 
+@pytest.fixture(scope="class")
+def setup_file_dic():
+    """Set up a test file dictionary, shared across a test class.
+
+    Class scope amortizes the dict construction across the cases that use
+    it; no such test mutates the dictionary. monkeypatch is function-scoped,
+    so the attribute is saved and restored manually.
+    """
+    import restsdk_public
+
+    test_fileDIC = {
+        "1": {"Name": "root", "Parent": None, "contentID": "content1"},
+        "2": {"Name": "folder1", "Parent": "1", "contentID": None},
+        "3": {"Name": "folder2", "Parent": "2", "contentID": None},
+        "4": {"Name": "file.txt", "Parent": "3", "contentID": "content4"},
+        "5": {"Name": "orphan.txt", "Parent": None, "contentID": "content5"},
+    }
+
+    had_attr = hasattr(restsdk_public, 'fileDIC')
+    saved = getattr(restsdk_public, 'fileDIC', None)
+    restsdk_public.fileDIC = test_fileDIC
+    yield test_fileDIC
+    if had_attr:
+        restsdk_public.fileDIC = saved
+    else:
+        del restsdk_public.fileDIC
+
+
 class TestFileDictionaryOperations:
     """Test file dictionary traversal and lookup operations.
-    
+
     Note: These functions rely on module-level 'fileDIC' which is only
     initialized in the main block. We test them by temporarily creating
     the expected module attribute.
     """
-    
-    @pytest.fixture
-    def setup_file_dic(self, monkeypatch):
-        """Set up a test file dictionary."""
-        import restsdk_public
-        
-        test_fileDIC = {
-            "1": {"Name": "root", "Parent": None, "contentID": "content1"},
-            "2": {"Name": "folder1", "Parent": "1", "contentID": None},
-            "3": {"Name": "folder2", "Parent": "2", "contentID": None},
-            "4": {"Name": "file.txt", "Parent": "3", "contentID": "content4"},
-            "5": {"Name": "orphan.txt", "Parent": None, "contentID": "content5"},
-        }
-        
-        # Create the attribute if it doesn't exist, then set it
-        if not hasattr(restsdk_public, 'fileDIC'):
-            restsdk_public.fileDIC = {}
-        monkeypatch.setattr(restsdk_public, 'fileDIC', test_fileDIC)
-        return test_fileDIC
-    
-    def test_findNextParent_with_parent(self, setup_file_dic):
-        """Test finding next parent when it exists."""
-        assert findNextParent("2") == "1"
-        assert findNextParent("3") == "2"
-        assert findNextParent("4") == "3"
-    
-    def test_findNextParent_no_parent(self, setup_file_dic):
-        """Test finding next parent when none exists."""
-        assert findNextParent("1") is None
-        assert findNextParent("5") is None
-    
-    def test_findNextParent_nonexistent_id(self, setup_file_dic):
-        """Test finding next parent for nonexistent ID."""
-        assert findNextParent("999") is None
+
+    @pytest.mark.parametrize("fid,expected", [
+        ("2", "1"),
+        ("3", "2"),
+        ("4", "3"),
+        ("1", None),
+        ("5", None),
+        ("999", None),
+    ])
+    def test_findNextParent(self, setup_file_dic, fid, expected):
+        """Test finding next parent for existing, root, and unknown IDs."""
+        assert findNextParent(fid) == expected
     
     def test_hasAnotherParent_true(self, setup_file_dic):
         """Test checking for parent when it exists."""
@@ -420,9 +428,9 @@ class TestFileDictionaryOperations:
         assert _contentID_to_fileID["content4"] == "4"
         
         assert "root" in _name_to_fileID
-        assert _name_to_fileID["root"] == "1"
+        assert _name_to_fileID["root"] == ["1"]
         assert "file.txt" in _name_to_fileID
-        assert _name_to_fileID["file.txt"] == "4"
+        assert _name_to_fileID["file.txt"] == ["4"]
     
     def test_filenameToID_by_content_id(self, setup_file_dic, monkeypatch):
         """Test looking up file ID by content ID."""
@@ -435,10 +443,10 @@ class TestFileDictionaryOperations:
             "content5": "5"
         })
         monkeypatch.setattr(restsdk_public, '_name_to_fileID', {
-            "root": "1",
-            "file.txt": "4"
+            "root": ["1"],
+            "file.txt": ["4"]
         })
-        
+
         assert filenameToID("content1") == "1"
         assert filenameToID("content4") == "4"
     
@@ -448,13 +456,24 @@ class TestFileDictionaryOperations:
         
         monkeypatch.setattr(restsdk_public, '_contentID_to_fileID', {})
         monkeypatch.setattr(restsdk_public, '_name_to_fileID', {
-            "root": "1",
-            "file.txt": "4"
+            "root": ["1"],
+            "file.txt": ["4"]
         })
-        
+
         assert filenameToID("file.txt") == "4"
         assert filenameToID("root") == "1"
-    
+
+    def test_filenameToID_duplicate_name_last_wins(self, setup_file_dic, monkeypatch):
+        """Duplicate names resolve to the last id, matching the old dict build."""
+        import restsdk_public
+
+        monkeypatch.setattr(restsdk_public, '_contentID_to_fileID', {})
+        monkeypatch.setattr(restsdk_public, '_name_to_fileID', {
+            "file.txt": ["4", "9"]
+        })
+
+        assert filenameToID("file.txt") == "9"
+
     def test_filenameToID_not_found(self, setup_file_dic, monkeypatch):
         """Test looking up nonexistent filename."""
         import restsdk_public
@@ -7,6 +7,7 @@ Coverage: pytest tests/test_symlink_farm.py --cov=create_symlink_farm --cov-repo
 
 import os
 import sqlite3
+import sys
 import tempfile
 from pathlib import Path
 from unittest.mock import patch
@@ -14,6 +15,7 @@ from unittest.mock import patch
 import pytest
 
 from create_symlink_farm import (
+    main,
     load_files_from_db,
     find_root_dir_name,
     reconstruct_path,
@@ -39,275 +41,396 @@ CREATE TABLE Files(
 
 
 def create_test_db(tmp_path: Path) -> Path:
-    """Create a test database with the Files schema."""
+    """Create a test database with the Files schema.
+
+    Throwaway DBs don't need durability, so the write path is tuned for
+    speed: in-memory journal, no fsync, exclusive lock, larger cache.
+    """
     db_path = tmp_path / "index.db"
     conn = sqlite3.connect(str(db_path))
+    conn.executescript(
+        "PRAGMA journal_mode=MEMORY;"
+        "PRAGMA synchronous=OFF;"
+        "PRAGMA temp_store=MEMORY;"
+        "PRAGMA locking_mode=EXCLUSIVE;"
+        "PRAGMA cache_size=-10000;"
+    )
     conn.executescript(FILES_SCHEMA)
     conn.commit()
     conn.close()
     return db_path
 
 
-def insert_file(db_path: Path, fid: str, name: str, parent_id=None, content_id=None):
-    """Insert a file record into the test database."""
+def create_test_db_with_rows(tmp_path: Path, sql_inserts: str) -> Path:
+    """Create a test database and seed it in one executescript call.
+
+    Schema plus inserts run on a single connection, halving the
+    connect/close round trips of create_test_db followed by raw inserts.
+    """
+    db_path = tmp_path / "index.db"
     conn = sqlite3.connect(str(db_path))
-    cur = conn.cursor()
-    cur.execute(
+    conn.executescript(FILES_SCHEMA + sql_inserts)
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def insert_file(db, fid: str, name: str, parent_id=None, content_id=None):
+    """Insert a file record into the test database."""
+    insert_files(db, [(fid, parent_id, content_id, name)])
+
+
+def insert_files(db, rows):
+    """Insert (id, parentID, contentID, name) rows in one transaction.
+
+    ``db`` may be a path or an already-open sqlite3.Connection; passing a
+    connection lets a test seed several batches without reconnecting per
+    call. One executemany instead of an execute per row; for large seeds
+    this is orders of magnitude faster.
+    """
+    if isinstance(db, sqlite3.Connection):
+        conn = db
+        own_conn = False
+    else:
+        conn = sqlite3.connect(str(db))
+        own_conn = True
+    conn.execute("BEGIN")
+    conn.executemany(
         "INSERT INTO Files (id, parentID, contentID, name) VALUES (?, ?, ?, ?)",
-        (fid, parent_id, content_id, name)
+        rows
     )
     conn.commit()
+    if own_conn:
+        conn.close()
+
+
+# Common seed shapes shared by several tests, built once per session as
+# in-memory template DBs and block-copied per test via Connection.backup.
+_TEMPLATE_SEEDS = {
+    "single_file": [("1", None, "abc123", "photo.jpg")],
+    "nested": [
+        ("1", None, None, "Photos"),
+        ("2", "1", None, "2024"),
+        ("3", "2", "abc123", "photo.jpg"),
+    ],
+    "pipe": [
+        ("1", None, None, "folder|name"),
+        ("2", "1", "abc123", "file|test.jpg"),
+    ],
+    "auth_root": [
+        ("1", None, None, "auth0|abc123"),
+        ("2", "1", None, "Photos"),
+        ("3", "2", "xyz789", "photo.jpg"),
+    ],
+}
+
+
+@pytest.fixture(scope="session")
+def db_templates():
+    """Build each common seed once as an in-memory database."""
+    templates = {}
+    for shape, rows in _TEMPLATE_SEEDS.items():
+        conn = sqlite3.connect(":memory:")
+        conn.executescript(FILES_SCHEMA)
+        insert_files(conn, rows)
+        templates[shape] = conn
+    yield templates
+    for conn in templates.values():
+        conn.close()
+
+
+@pytest.fixture(scope="session")
+def source_file_template(tmp_path_factory):
+    """One payload file per session; tests hardlink it into their trees."""
+    tmpl = tmp_path_factory.mktemp("src-template") / "payload"
+    tmpl.write_text("data")
+    return tmpl
+
+
+@pytest.fixture
+def make_source_tree(tmp_path, source_file_template):
+    """Build source/<shard>/<content_id> entries by hardlinking the template.
+
+    One mkdir per shard plus a link per file instead of a
+    mkdir/write_text pair for every content id.
+    """
+    def _make(*content_ids):
+        source_dir = tmp_path / "source"
+        # Plain string paths in the loops: each Path / re-parses and
+        # re-stringifies, which adds up when trees grow.
+        src = str(source_dir)
+        tmpl = str(source_file_template)
+        os.makedirs(src, exist_ok=True)
+        # One mkdir per unique shard letter, then one link per file.
+        for shard in {cid[0] for cid in content_ids}:
+            os.makedirs(os.path.join(src, shard), exist_ok=True)
+        for cid in content_ids:
+            os.link(tmpl, os.path.join(src, cid[0], cid))
+        return source_dir
+    return _make
+
+
+@pytest.fixture(scope="session")
+def shared_db(db_templates, tmp_path_factory):
+    """On-disk clone of the nested template for read-only tests."""
+    db_path = tmp_path_factory.mktemp("shared-db") / "index.db"
+    dest = sqlite3.connect(str(db_path))
+    db_templates["nested"].backup(dest)
+    dest.close()
+    return str(db_path)
+
+
+@pytest.fixture(scope="session")
+def loaded_files(shared_db):
+    """load_files_from_db result memoized for the session.
+
+    The function is pure for a given DB file, so read-only tests share
+    one parse instead of re-reading the same rows.
+    """
+    return load_files_from_db(shared_db)
+
+
+@pytest.fixture
+def quiet_stdout(monkeypatch):
+    """Send the tool's chatty prints to /dev/null.
+
+    create_symlink_farm and main() print headers, progress and summaries;
+    tests that never read captured output shouldn't pay for buffering it.
+    """
+    with open(os.devnull, "w") as devnull:
+        monkeypatch.setattr(sys, "stdout", devnull)
+        yield
+
+
+@pytest.fixture
+def clone_db(db_templates, tmp_path):
+    """Clone a pre-seeded template into this test's tmp_path.
+
+    Connection.backup is a page-level copy, so each test gets its own
+    on-disk DB without replaying schema DDL and inserts.
+    """
+    def _clone(shape: str) -> Path:
+        db_path = tmp_path / "index.db"
+        dest = sqlite3.connect(str(db_path))
+        db_templates[shape].backup(dest)
+        dest.close()
+        return db_path
+    return _clone
+
+
+@pytest.fixture(scope="class")
+def db_conn(tmp_path_factory):
+    """One DB file and open connection shared by a test class.
+
+    Tests seed through the yielded connection (committing so the path-based
+    reader sees the rows) and clear Files between cases — cheaper than
+    rebuilding the file and reconnecting per test.
+    """
+    db_path = tmp_path_factory.mktemp("db") / "index.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(FILES_SCHEMA)
+    conn.commit()
+    yield conn, str(db_path)
     conn.close()
 
 
 class TestLoadFilesFromDb:
     """Tests for load_files_from_db function."""
-    
-    def test_load_empty_db(self, tmp_path):
+
+    @pytest.fixture(autouse=True)
+    def _reset_rows(self, db_conn):
+        conn, _ = db_conn
+        conn.execute("DELETE FROM Files")
+        conn.commit()
+
+    def test_load_empty_db(self, db_conn):
         """Test loading from empty database."""
-        db_path = create_test_db(tmp_path)
-        result = load_files_from_db(str(db_path))
+        _, db_path = db_conn
+        result = load_files_from_db(db_path)
         assert result == {}
-    
-    def test_load_single_file(self, tmp_path):
+
+    def test_load_single_file(self, db_conn):
         """Test loading single file record."""
-        db_path = create_test_db(tmp_path)
-        insert_file(db_path, "1", "photo.jpg", None, "abc123")
-        
-        result = load_files_from_db(str(db_path))
-        
+        conn, db_path = db_conn
+        insert_file(conn, "1", "photo.jpg", None, "abc123")
+
+        result = load_files_from_db(db_path)
+
         assert len(result) == 1
         assert "1" in result
         assert result["1"]["Name"] == "photo.jpg"
         assert result["1"]["contentID"] == "abc123"
         assert result["1"]["Parent"] is None
-    
-    def test_load_multiple_files(self, tmp_path):
+
+    def test_load_multiple_files(self, db_conn):
         """Test loading multiple file records."""
-        db_path = create_test_db(tmp_path)
-        insert_file(db_path, "1", "folder", None, None)
-        insert_file(db_path, "2", "photo.jpg", "1", "abc123")
-        insert_file(db_path, "3", "video.mov", "1", "def456")
-        
-        result = load_files_from_db(str(db_path))
-        
+        conn, db_path = db_conn
+        insert_files(conn, [
+            ("1", None, None, "folder"),
+            ("2", "1", "abc123", "photo.jpg"),
+            ("3", "1", "def456", "video.mov"),
+        ])
+
+        result = load_files_from_db(db_path)
+
         assert len(result) == 3
         assert result["2"]["Parent"] == "1"
         assert result["3"]["Parent"] == "1"
-    
-    def test_load_preserves_timestamps(self, tmp_path):
+
+    def test_load_preserves_timestamps(self, db_conn):
         """Test that timestamp fields are loaded."""
-        db_path = create_test_db(tmp_path)
-        conn = sqlite3.connect(str(db_path))
+        conn, db_path = db_conn
         conn.execute(
-            "INSERT INTO Files (id, name, imageDate, videoDate, cTime, birthTime) VALUES (?, ?, ?, ?, ?, ?)",
-            ("1", "photo.jpg", 1000, 2000, 3000, 4000)
+            "INSERT INTO Files (id, name, imageDate, videoDate, cTime, birthTime)"
+            " VALUES ('1', 'photo.jpg', 1000, 2000, 3000, 4000)"
         )
         conn.commit()
-        conn.close()
-        
-        result = load_files_from_db(str(db_path))
-        
+
+        result = load_files_from_db(db_path)
+
         assert result["1"]["imageDate"] == 1000
         assert result["1"]["videoDate"] == 2000
         assert result["1"]["cTime"] == 3000
         assert result["1"]["birthTime"] == 4000
 
 
+# Read-only file_dic shapes shared across the pure-function tests below.
+# find_root_dir_name and reconstruct_path never mutate their input, so the
+# same dicts are passed straight in; take dict(...) copies if that changes.
+_NO_ROOT_DIC = {"1": {"Name": "Photos"}, "2": {"Name": "Documents"}}
+_AUTH_PIPE_DIC = {"1": {"Name": "auth0|5e62c7d40ec9700d5c82bb89"}, "2": {"Name": "Photos"}}
+_AUTH_ONLY_DIC = {"1": {"Name": "auth_folder"}, "2": {"Name": "Photos"}}
+_PIPE_ONLY_DIC = {"1": {"Name": "folder|name"}, "2": {"Name": "Photos"}}
+
+_SINGLE_FILE_DIC = {"1": {"Name": "photo.jpg", "Parent": None}}
+_PARENT_DIC = {
+    "1": {"Name": "Photos", "Parent": None},
+    "2": {"Name": "photo.jpg", "Parent": "1"},
+}
+_DEEP_NESTING_DIC = {
+    "1": {"Name": "Root", "Parent": None},
+    "2": {"Name": "Level1", "Parent": "1"},
+    "3": {"Name": "Level2", "Parent": "2"},
+    "4": {"Name": "file.txt", "Parent": "3"},
+}
+_AUTH_ROOT_DIC = {
+    "1": {"Name": "auth0|abc123", "Parent": None},
+    "2": {"Name": "Photos", "Parent": "1"},
+    "3": {"Name": "photo.jpg", "Parent": "2"},
+}
+_BACKSLASH_DIC = {
+    "1": {"Name": "Folder\\Subfolder", "Parent": None},
+    "2": {"Name": "file.txt", "Parent": "1"},
+}
+_LEADING_SLASH_DIC = {
+    "1": {"Name": "/root", "Parent": None},
+    "2": {"Name": "file.txt", "Parent": "1"},
+}
+
+
 class TestFindRootDirName:
     """Tests for find_root_dir_name function."""
-    
-    def test_no_root_dir(self):
-        """Test when no special root directory exists."""
-        file_dic = {
-            "1": {"Name": "Photos"},
-            "2": {"Name": "Documents"},
-        }
-        result = find_root_dir_name(file_dic)
-        assert result is None
-    
-    def test_finds_auth_pipe_dir(self):
-        """Test finding directory with auth and | in name."""
-        file_dic = {
-            "1": {"Name": "auth0|5e62c7d40ec9700d5c82bb89"},
-            "2": {"Name": "Photos"},
-        }
-        result = find_root_dir_name(file_dic)
-        assert result == "auth0|5e62c7d40ec9700d5c82bb89"
-    
-    def test_auth_without_pipe(self):
-        """Test directory with auth but no pipe."""
-        file_dic = {
-            "1": {"Name": "auth_folder"},
-            "2": {"Name": "Photos"},
-        }
-        result = find_root_dir_name(file_dic)
-        assert result is None
-    
-    def test_pipe_without_auth(self):
-        """Test directory with pipe but no auth."""
-        file_dic = {
-            "1": {"Name": "folder|name"},
-            "2": {"Name": "Photos"},
-        }
-        result = find_root_dir_name(file_dic)
-        assert result is None
+
+    @pytest.mark.parametrize(
+        "file_dic, expected",
+        [
+            pytest.param(_NO_ROOT_DIC, None, id="no-root-dir"),
+            pytest.param(_AUTH_PIPE_DIC, "auth0|5e62c7d40ec9700d5c82bb89", id="auth-and-pipe"),
+            pytest.param(_AUTH_ONLY_DIC, None, id="auth-without-pipe"),
+            pytest.param(_PIPE_ONLY_DIC, None, id="pipe-without-auth"),
+        ],
+    )
+    def test_find_root_dir_name(self, file_dic, expected):
+        """Only a name containing both 'auth' and '|' counts as the root."""
+        assert find_root_dir_name(file_dic) == expected
 
 
 class TestReconstructPath:
     """Tests for reconstruct_path function."""
-    
-    def test_single_file_no_parent(self):
-        """Test file with no parent."""
-        file_dic = {
-            "1": {"Name": "photo.jpg", "Parent": None},
-        }
-        result = reconstruct_path("1", file_dic)
-        assert result == "photo.jpg"
-    
-    def test_file_with_parent(self):
-        """Test file with one parent."""
-        file_dic = {
-            "1": {"Name": "Photos", "Parent": None},
-            "2": {"Name": "photo.jpg", "Parent": "1"},
-        }
-        result = reconstruct_path("2", file_dic)
-        assert result == "Photos/photo.jpg"
-    
-    def test_deep_nesting(self):
-        """Test deeply nested file."""
-        file_dic = {
-            "1": {"Name": "Root", "Parent": None},
-            "2": {"Name": "Level1", "Parent": "1"},
-            "3": {"Name": "Level2", "Parent": "2"},
-            "4": {"Name": "file.txt", "Parent": "3"},
-        }
-        result = reconstruct_path("4", file_dic)
-        assert result == "Root/Level1/Level2/file.txt"
-    
-    def test_strip_root_dir(self):
-        """Test stripping root directory from path."""
-        file_dic = {
-            "1": {"Name": "auth0|abc123", "Parent": None},
-            "2": {"Name": "Photos", "Parent": "1"},
-            "3": {"Name": "photo.jpg", "Parent": "2"},
-        }
-        result = reconstruct_path("3", file_dic, "auth0|abc123")
-        assert result == "Photos/photo.jpg"
-    
-    def test_backslash_normalization(self):
-        """Test that backslashes are converted to forward slashes."""
-        file_dic = {
-            "1": {"Name": "Folder\\Subfolder", "Parent": None},
-            "2": {"Name": "file.txt", "Parent": "1"},
-        }
-        result = reconstruct_path("2", file_dic)
-        assert "\\" not in result
-        assert "/" in result
-    
-    def test_nonexistent_file(self):
-        """Test with nonexistent file ID."""
-        file_dic = {"1": {"Name": "photo.jpg", "Parent": None}}
-        result = reconstruct_path("999", file_dic)
-        assert result is None
-    
-    def test_leading_slash_stripped(self):
-        """Test that leading slash is stripped."""
-        file_dic = {
-            "1": {"Name": "/root", "Parent": None},
-            "2": {"Name": "file.txt", "Parent": "1"},
-        }
-        result = reconstruct_path("2", file_dic)
-        assert not result.startswith("/")
+
+    @pytest.mark.parametrize(
+        "file_id, file_dic, root_to_strip, expected",
+        [
+            pytest.param("1", _SINGLE_FILE_DIC, None, "photo.jpg", id="no-parent"),
+            pytest.param("2", _PARENT_DIC, None, "Photos/photo.jpg", id="one-parent"),
+            pytest.param("4", _DEEP_NESTING_DIC, None, "Root/Level1/Level2/file.txt", id="deep-nesting"),
+            pytest.param("3", _AUTH_ROOT_DIC, "auth0|abc123", "Photos/photo.jpg", id="strip-root-dir"),
+            pytest.param("2", _BACKSLASH_DIC, None, "Folder/Subfolder/file.txt", id="backslash-normalization"),
+            pytest.param("999", _SINGLE_FILE_DIC, None, None, id="nonexistent-file"),
+            pytest.param("2", _LEADING_SLASH_DIC, None, "root/file.txt", id="leading-slash-stripped"),
+        ],
+    )
+    def test_reconstruct_path(self, file_id, file_dic, root_to_strip, expected):
+        """Paths are rebuilt parent-by-parent, normalized and root-stripped."""
+        assert reconstruct_path(file_id, file_dic, root_to_strip) == expected
+
+    def test_reconstruct_from_loaded_db(self, loaded_files):
+        """Round trip: a dict loaded from the DB reconstructs correctly."""
+        assert reconstruct_path("3", loaded_files) == "Photos/2024/photo.jpg"
 
 
 class TestGetSourceFilePath:
-    """Tests for get_source_file_path function."""
-    
-    def test_sharded_file_exists(self, tmp_path):
-        """Test finding file in sharded directory structure."""
-        # Create sharded directory structure
-        shard_dir = tmp_path / "a"
-        shard_dir.mkdir()
-        source_file = shard_dir / "abc123"
-        source_file.write_text("data")
-        
-        result = get_source_file_path("abc123", str(tmp_path))
-        assert result == str(source_file)
-    
-    def test_flat_file_exists(self, tmp_path):
-        """Test finding file in flat directory structure."""
-        source_file = tmp_path / "xyz789"
-        source_file.write_text("data")
-        
-        result = get_source_file_path("xyz789", str(tmp_path))
-        assert result == str(source_file)
-    
-    def test_file_not_found(self, tmp_path):
-        """Test when file doesn't exist."""
-        result = get_source_file_path("nonexistent", str(tmp_path))
-        assert result is None
-    
-    def test_empty_content_id(self, tmp_path):
-        """Test with empty content ID."""
-        result = get_source_file_path("", str(tmp_path))
-        assert result is None
-    
-    def test_none_content_id(self, tmp_path):
-        """Test with None content ID."""
-        result = get_source_file_path(None, str(tmp_path))
-        assert result is None
-    
-    def test_prefers_sharded_over_flat(self, tmp_path):
-        """Test that sharded location is preferred over flat."""
-        # Create both sharded and flat files
-        shard_dir = tmp_path / "a"
-        shard_dir.mkdir()
-        sharded_file = shard_dir / "abc123"
-        sharded_file.write_text("sharded")
-        
-        flat_file = tmp_path / "abc123"
-        flat_file.write_text("flat")
-        
-        result = get_source_file_path("abc123", str(tmp_path))
-        assert result == str(sharded_file)
+    """Tests for get_source_file_path function.
+
+    The function only calls os.path.join and os.path.exists, so each case
+    stubs exists() with a membership check — no directories or files are
+    actually created.
+    """
+
+    @pytest.mark.parametrize(
+        "content_id, existing, expected",
+        [
+            pytest.param("abc123", {("a", "abc123")}, ("a", "abc123"), id="sharded"),
+            pytest.param("xyz789", {("xyz789",)}, ("xyz789",), id="flat"),
+            pytest.param("nonexistent", set(), None, id="not-found"),
+            pytest.param("", set(), None, id="empty-content-id"),
+            pytest.param(None, set(), None, id="none-content-id"),
+            pytest.param(
+                "abc123", {("a", "abc123"), ("abc123",)}, ("a", "abc123"),
+                id="prefers-sharded-over-flat",
+            ),
+        ],
+    )
+    def test_lookup(self, content_id, existing, expected):
+        source_dir = os.path.join(os.sep, "source")
+        allowed = {os.path.join(source_dir, *parts) for parts in existing}
+
+        with patch("create_symlink_farm.os.path.exists", lambda p: p in allowed):
+            result = get_source_file_path(content_id, source_dir)
+
+        if expected is None:
+            assert result is None
+        else:
+            assert result == os.path.join(source_dir, *expected)
 
 
 class TestSanitizePath:
     """Tests for sanitize_path function."""
-    
-    def test_no_sanitization(self):
-        """Test path unchanged when sanitize_pipes=False."""
-        result = sanitize_path("folder|name/file|test.jpg", False)
-        assert result == "folder|name/file|test.jpg"
-    
-    def test_sanitize_pipes(self):
-        """Test pipe replacement when sanitize_pipes=True."""
-        result = sanitize_path("folder|name/file|test.jpg", True)
-        assert result == "folder-name/file-test.jpg"
-    
-    def test_no_pipes_to_sanitize(self):
-        """Test path without pipes."""
-        result = sanitize_path("folder/file.jpg", True)
-        assert result == "folder/file.jpg"
+
+    @pytest.mark.parametrize(
+        "path, sanitize_pipes, expected",
+        [
+            pytest.param("folder|name/file|test.jpg", False, "folder|name/file|test.jpg", id="disabled"),
+            pytest.param("folder|name/file|test.jpg", True, "folder-name/file-test.jpg", id="pipes-replaced"),
+            pytest.param("folder/file.jpg", True, "folder/file.jpg", id="nothing-to-replace"),
+        ],
+    )
+    def test_sanitize_path(self, path, sanitize_pipes, expected):
+        """Pipes become dashes only when sanitize_pipes is set."""
+        assert sanitize_path(path, sanitize_pipes) == expected
 
 
+@pytest.mark.usefixtures("quiet_stdout")
 class TestCreateSymlinkFarm:
     """Tests for create_symlink_farm function."""
     
-    def test_create_single_symlink(self, tmp_path):
+    def test_create_single_symlink(self, tmp_path, clone_db, make_source_tree):
         """Test creating a single symlink."""
-        # Setup database
-        db_path = create_test_db(tmp_path)
-        insert_file(db_path, "1", "photo.jpg", None, "abc123")
+        db_path = clone_db("single_file")
         
         # Setup source file
-        source_dir = tmp_path / "source"
-        source_dir.mkdir()
-        shard_dir = source_dir / "a"
-        shard_dir.mkdir()
-        source_file = shard_dir / "abc123"
-        source_file.write_text("photo data")
+        source_dir = make_source_tree("abc123")
+        source_file = source_dir / "a" / "abc123"
         
         # Setup farm directory
         farm_dir = tmp_path / "farm"
@@ -324,20 +447,13 @@ class TestCreateSymlinkFarm:
         # Verify symlink exists and points correctly
         symlink_path = farm_dir / "photo.jpg"
         assert symlink_path.is_symlink()
-        assert os.readlink(str(symlink_path)) == str(source_file)
+        assert symlink_path.readlink() == source_file
     
-    def test_create_nested_structure(self, tmp_path):
+    def test_create_nested_structure(self, tmp_path, clone_db, make_source_tree):
         """Test creating nested directory structure."""
-        db_path = create_test_db(tmp_path)
-        insert_file(db_path, "1", "Photos", None, None)  # Directory
-        insert_file(db_path, "2", "2024", "1", None)     # Directory
-        insert_file(db_path, "3", "photo.jpg", "2", "abc123")
+        db_path = clone_db("nested")
         
-        source_dir = tmp_path / "source"
-        source_dir.mkdir()
-        shard_dir = source_dir / "a"
-        shard_dir.mkdir()
-        (shard_dir / "abc123").write_text("data")
+        source_dir = make_source_tree("abc123")
         
         farm_dir = tmp_path / "farm"
         
@@ -367,37 +483,38 @@ class TestCreateSymlinkFarm:
         assert created == 0
         assert no_source == 1
     
-    def test_dry_run(self, tmp_path):
-        """Test dry run doesn't create symlinks."""
-        db_path = create_test_db(tmp_path)
-        insert_file(db_path, "1", "photo.jpg", None, "abc123")
-        
-        source_dir = tmp_path / "source"
-        source_dir.mkdir()
-        shard_dir = source_dir / "a"
-        shard_dir.mkdir()
-        (shard_dir / "abc123").write_text("data")
-        
+    def test_dry_run(self, tmp_path, monkeypatch):
+        """Test dry run doesn't create symlinks.
+
+        A dry run never touches the filesystem, so neither should its
+        setup: DB load and source lookup are stubbed and the whole test
+        runs without a single mkdir/write.
+        """
+        import create_symlink_farm as csf
+
+        monkeypatch.setattr(
+            csf, "load_files_from_db",
+            lambda _db: {"1": {"Name": "photo.jpg", "Parent": None, "contentID": "abc123"}}
+        )
+        monkeypatch.setattr(
+            csf, "get_source_file_path",
+            lambda cid, src: os.path.join(src, cid[0], cid)
+        )
+
         farm_dir = tmp_path / "farm"
-        
+
         created, _, _, _ = create_symlink_farm(
-            str(db_path), str(source_dir), str(farm_dir), dry_run=True
+            "unused.db", str(tmp_path / "source"), str(farm_dir), dry_run=True
         )
-        
+
         assert created == 1
         assert not farm_dir.exists()  # Farm directory not created
     
-    def test_sanitize_pipes_in_path(self, tmp_path):
+    def test_sanitize_pipes_in_path(self, tmp_path, clone_db, make_source_tree):
         """Test pipe sanitization in paths."""
-        db_path = create_test_db(tmp_path)
-        insert_file(db_path, "1", "folder|name", None, None)
-        insert_file(db_path, "2", "file|test.jpg", "1", "abc123")
+        db_path = clone_db("pipe")
         
-        source_dir = tmp_path / "source"
-        source_dir.mkdir()
-        shard_dir = source_dir / "a"
-        shard_dir.mkdir()
-        (shard_dir / "abc123").write_text("data")
+        source_dir = make_source_tree("abc123")
         
         farm_dir = tmp_path / "farm"
         
@@ -409,18 +526,11 @@ class TestCreateSymlinkFarm:
         symlink_path = farm_dir / "folder-name" / "file-test.jpg"
         assert symlink_path.is_symlink()
     
-    def test_strip_root_auth_dir(self, tmp_path):
+    def test_strip_root_auth_dir(self, tmp_path, clone_db, make_source_tree):
         """Test stripping auth root directory from paths."""
-        db_path = create_test_db(tmp_path)
-        insert_file(db_path, "1", "auth0|abc123", None, None)  # Root to strip
-        insert_file(db_path, "2", "Photos", "1", None)
-        insert_file(db_path, "3", "photo.jpg", "2", "xyz789")
+        db_path = clone_db("auth_root")
         
-        source_dir = tmp_path / "source"
-        source_dir.mkdir()
-        shard_dir = source_dir / "x"
-        shard_dir.mkdir()
-        (shard_dir / "xyz789").write_text("data")
+        source_dir = make_source_tree("xyz789")
         
         farm_dir = tmp_path / "farm"
         
@@ -434,17 +544,12 @@ class TestCreateSymlinkFarm:
         auth_dir = farm_dir / "auth0|abc123"
         assert not auth_dir.exists()
     
-    def test_replace_existing_symlink(self, tmp_path):
+    def test_replace_existing_symlink(self, tmp_path, clone_db, make_source_tree):
         """Test that existing symlinks are replaced."""
-        db_path = create_test_db(tmp_path)
-        insert_file(db_path, "1", "photo.jpg", None, "abc123")
+        db_path = clone_db("single_file")
         
-        source_dir = tmp_path / "source"
-        source_dir.mkdir()
-        shard_dir = source_dir / "a"
-        shard_dir.mkdir()
-        source_file = shard_dir / "abc123"
-        source_file.write_text("data")
+        source_dir = make_source_tree("abc123")
+        source_file = source_dir / "a" / "abc123"
         
         farm_dir = tmp_path / "farm"
         farm_dir.mkdir()
@@ -459,18 +564,13 @@ class TestCreateSymlinkFarm:
         
         assert created == 1
         assert errors == 0
-        assert os.readlink(str(existing_link)) == str(source_file)
+        assert existing_link.readlink() == source_file
     
-    def test_skip_existing_real_file(self, tmp_path):
+    def test_skip_existing_real_file(self, tmp_path, clone_db, make_source_tree):
         """Test that existing real files are not replaced."""
-        db_path = create_test_db(tmp_path)
-        insert_file(db_path, "1", "photo.jpg", None, "abc123")
+        db_path = clone_db("single_file")
         
-        source_dir = tmp_path / "source"
-        source_dir.mkdir()
-        shard_dir = source_dir / "a"
-        shard_dir.mkdir()
-        (shard_dir / "abc123").write_text("source data")
+        source_dir = make_source_tree("abc123")
         
         farm_dir = tmp_path / "farm"
         farm_dir.mkdir()
@@ -489,77 +589,53 @@ class TestCreateSymlinkFarm:
         assert not existing_file.is_symlink()
 
 
+@pytest.mark.usefixtures("quiet_stdout")
 class TestMainFunction:
     """Tests for main() function and CLI."""
     
     def test_missing_db_exits(self, tmp_path):
         """Test that missing database causes exit."""
-        from create_symlink_farm import main
-        
-        with patch('sys.argv', ['prog', '--db', '/nonexistent/db', '--source', str(tmp_path), '--farm', str(tmp_path / 'farm')]):
-            with pytest.raises(SystemExit) as exc_info:
-                main()
-            assert exc_info.value.code == 1
+        with pytest.raises(SystemExit) as exc_info:
+            main(['--db', '/nonexistent/db', '--source', str(tmp_path), '--farm', str(tmp_path / 'farm')])
+        assert exc_info.value.code == 1
     
     def test_missing_source_exits(self, tmp_path):
         """Test that missing source directory causes exit."""
-        from create_symlink_farm import main
-        
         db_path = create_test_db(tmp_path)
         
-        with patch('sys.argv', ['prog', '--db', str(db_path), '--source', '/nonexistent/source', '--farm', str(tmp_path / 'farm')]):
-            with pytest.raises(SystemExit) as exc_info:
-                main()
-            assert exc_info.value.code == 1
+        with pytest.raises(SystemExit) as exc_info:
+            main(['--db', str(db_path), '--source', '/nonexistent/source', '--farm', str(tmp_path / 'farm')])
+        assert exc_info.value.code == 1
     
-    def test_successful_run(self, tmp_path):
+    def test_successful_run(self, tmp_path, clone_db, make_source_tree):
         """Test successful full run through main()."""
-        from create_symlink_farm import main
-        
-        # Setup database
-        db_path = create_test_db(tmp_path)
-        insert_file(db_path, "1", "photo.jpg", None, "abc123")
+        db_path = clone_db("single_file")
         
         # Setup source
-        source_dir = tmp_path / "source"
-        source_dir.mkdir()
-        shard_dir = source_dir / "a"
-        shard_dir.mkdir()
-        (shard_dir / "abc123").write_text("data")
+        source_dir = make_source_tree("abc123")
         
         farm_dir = tmp_path / "farm"
         
-        with patch('sys.argv', ['prog', '--db', str(db_path), '--source', str(source_dir), '--farm', str(farm_dir)]):
-            result = main()
+        result = main(['--db', str(db_path), '--source', str(source_dir), '--farm', str(farm_dir)])
         
         assert result == 0
         assert (farm_dir / "photo.jpg").is_symlink()
     
-    def test_dry_run_mode(self, tmp_path):
+    def test_dry_run_mode(self, tmp_path, clone_db, make_source_tree):
         """Test dry run mode through main()."""
-        from create_symlink_farm import main
-        
-        db_path = create_test_db(tmp_path)
-        insert_file(db_path, "1", "photo.jpg", None, "abc123")
+        db_path = clone_db("single_file")
         
-        source_dir = tmp_path / "source"
-        source_dir.mkdir()
-        shard_dir = source_dir / "a"
-        shard_dir.mkdir()
-        (shard_dir / "abc123").write_text("data")
+        source_dir = make_source_tree("abc123")
         
         farm_dir = tmp_path / "farm"
         
-        with patch('sys.argv', ['prog', '--db', str(db_path), '--source', str(source_dir), '--farm', str(farm_dir), '--dry-run']):
-            result = main()
+        result = main(['--db', str(db_path), '--source', str(source_dir), '--farm', str(farm_dir), '--dry-run'])
         
         assert result == 0
         assert not farm_dir.exists()
     
     def test_nonempty_farm_user_declines(self, tmp_path):
         """Test user declining to continue with non-empty farm."""
-        from create_symlink_farm import main
-        
         db_path = create_test_db(tmp_path)
         source_dir = tmp_path / "source"
         source_dir.mkdir()
@@ -568,59 +644,40 @@ class TestMainFunction:
         farm_dir.mkdir()
         (farm_dir / "existing.txt").write_text("data")
         
-        with patch('sys.argv', ['prog', '--db', str(db_path), '--source', str(source_dir), '--farm', str(farm_dir)]):
-            with patch('builtins.input', return_value='n'):
-                with pytest.raises(SystemExit) as exc_info:
-                    main()
-                assert exc_info.value.code == 0
+        with patch('builtins.input', return_value='n'):
+            with pytest.raises(SystemExit) as exc_info:
+                main(['--db', str(db_path), '--source', str(source_dir), '--farm', str(farm_dir)])
+            assert exc_info.value.code == 0
     
-    def test_nonempty_farm_user_accepts(self, tmp_path):
+    def test_nonempty_farm_user_accepts(self, tmp_path, clone_db, make_source_tree):
         """Test user accepting to continue with non-empty farm."""
-        from create_symlink_farm import main
-        
-        db_path = create_test_db(tmp_path)
-        insert_file(db_path, "1", "photo.jpg", None, "abc123")
+        db_path = clone_db("single_file")
         
-        source_dir = tmp_path / "source"
-        source_dir.mkdir()
-        shard_dir = source_dir / "a"
-        shard_dir.mkdir()
-        (shard_dir / "abc123").write_text("data")
+        source_dir = make_source_tree("abc123")
         
         farm_dir = tmp_path / "farm"
         farm_dir.mkdir()
         (farm_dir / "existing.txt").write_text("data")
         
-        with patch('sys.argv', ['prog', '--db', str(db_path), '--source', str(source_dir), '--farm', str(farm_dir)]):
-            with patch('builtins.input', return_value='y'):
-                result = main()
+        with patch('builtins.input', return_value='y'):
+            result = main(['--db', str(db_path), '--source', str(source_dir), '--farm', str(farm_dir)])
         
         assert result == 0
     
-    def test_verbose_mode(self, tmp_path):
+    def test_verbose_mode(self, tmp_path, clone_db, make_source_tree):
         """Test verbose output mode."""
-        from create_symlink_farm import main
-        
-        db_path = create_test_db(tmp_path)
-        insert_file(db_path, "1", "photo.jpg", None, "abc123")
+        db_path = clone_db("single_file")
         
-        source_dir = tmp_path / "source"
-        source_dir.mkdir()
-        shard_dir = source_dir / "a"
-        shard_dir.mkdir()
-        (shard_dir / "abc123").write_text("data")
+        source_dir = make_source_tree("abc123")
         
         farm_dir = tmp_path / "farm"
         
-        with patch('sys.argv', ['prog', '--db', str(db_path), '--source', str(source_dir), '--farm', str(farm_dir), '-v']):
-            result = main()
+        result = main(['--db', str(db_path), '--source', str(source_dir), '--farm', str(farm_dir), '-v'])
         
         assert result == 0
     
     def test_returns_error_code_on_errors(self, tmp_path):
         """Test that errors return non-zero exit code."""
-        from create_symlink_farm import main
-        
         db_path = create_test_db(tmp_path)
         # Insert file with content_id but source won't exist
         insert_file(db_path, "1", "photo.jpg", None, "missing123")
@@ -631,8 +688,7 @@ class TestMainFunction:
         farm_dir = tmp_path / "farm"
         
         # This should have no_source count but no errors
-        with patch('sys.argv', ['prog', '--db', str(db_path), '--source', str(source_dir), '--farm', str(farm_dir)]):
-            result = main()
+        result = main(['--db', str(db_path), '--source', str(source_dir), '--farm', str(farm_dir)])
         
         # no_source is not an error, so should return 0
         assert result == 0
@@ -641,16 +697,11 @@ class TestMainFunction:
 class TestVerboseOutput:
     """Tests for verbose output paths."""
     
-    def test_verbose_link_message(self, tmp_path, capsys):
+    def test_verbose_link_message(self, tmp_path, capsys, clone_db, make_source_tree):
         """Test verbose output shows LINK messages."""
-        db_path = create_test_db(tmp_path)
-        insert_file(db_path, "1", "photo.jpg", None, "abc123")
+        db_path = clone_db("single_file")
         
-        source_dir = tmp_path / "source"
-        source_dir.mkdir()
-        shard_dir = source_dir / "a"
-        shard_dir.mkdir()
-        (shard_dir / "abc123").write_text("data")
+        source_dir = make_source_tree("abc123")
         
         farm_dir = tmp_path / "farm"
         
@@ -677,20 +728,15 @@ class TestVerboseOutput:
         captured = capsys.readouterr()
         assert "[SKIP]" in captured.out
     
-    def test_verbose_error_handling(self, tmp_path, capsys):
+    def test_verbose_error_handling(self, tmp_path, capsys, make_source_tree):
         """Test verbose output shows ERROR messages."""
-        db_path = create_test_db(tmp_path)
         # File with empty name that will cause path issues
-        conn = sqlite3.connect(str(db_path))
-        conn.execute("INSERT INTO Files (id, name, contentID) VALUES (?, ?, ?)", ("1", "", "abc123"))
-        conn.commit()
-        conn.close()
+        db_path = create_test_db_with_rows(
+            tmp_path,
+            "INSERT INTO Files (id, name, contentID) VALUES ('1', '', 'abc123');"
+        )
         
-        source_dir = tmp_path / "source"
-        source_dir.mkdir()
-        shard_dir = source_dir / "a"
-        shard_dir.mkdir()
-        (shard_dir / "abc123").write_text("data")
+        source_dir = make_source_tree("abc123")
         
         farm_dir = tmp_path / "farm"
         
@@ -706,17 +752,21 @@ class TestVerboseOutput:
 class TestProgressOutput:
     """Tests for progress reporting."""
     
-    def test_progress_on_large_batch(self, tmp_path, capsys):
-        """Test progress is reported for large file counts."""
+    def test_progress_on_large_batch(self, tmp_path, capsys, monkeypatch):
+        """Test progress is reported when the interval threshold is crossed."""
+        import create_symlink_farm as csf
+
+        # Lower the interval instead of inserting 60 000 rows; 10 rows now
+        # cross the count-based trigger twice.
+        monkeypatch.setattr(csf, "PROGRESS_INTERVAL", 5)
+
         db_path = create_test_db(tmp_path)
-        
-        # Insert many files to trigger progress output
         conn = sqlite3.connect(str(db_path))
-        for i in range(60000):
-            conn.execute(
-                "INSERT INTO Files (id, name, contentID) VALUES (?, ?, ?)",
-                (str(i), f"file{i}.jpg", f"content{i}")
-            )
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO Files (id, name, contentID) VALUES (?, ?, ?)",
+            ((str(i), f"file{i}.jpg", f"content{i}") for i in range(10))
+        )
         conn.commit()
         conn.close()
         
@@ -735,11 +785,11 @@ class TestEdgeCases:
     
     def test_empty_name_file(self, tmp_path):
         """Test handling file with empty name."""
-        db_path = create_test_db(tmp_path)
-        conn = sqlite3.connect(str(db_path))
-        conn.execute("INSERT INTO Files (id, name, contentID) VALUES (?, ?, ?)", ("1", "", "abc123"))
-        conn.commit()
-        conn.close()
+        # File with empty name that will cause path issues
+        db_path = create_test_db_with_rows(
+            tmp_path,
+            "INSERT INTO Files (id, name, contentID) VALUES ('1', '', 'abc123');"
+        )
         
         source_dir = tmp_path / "source"
         source_dir.mkdir()
@@ -755,15 +805,12 @@ class TestEdgeCases:
     
     def test_circular_parent_reference(self, tmp_path):
         """Test handling of circular parent references."""
-        db_path = create_test_db(tmp_path)
         # Create circular reference (shouldn't happen but test defensively)
-        conn = sqlite3.connect(str(db_path))
-        conn.execute("INSERT INTO Files (id, parentID, name, contentID) VALUES (?, ?, ?, ?)", 
-                    ("1", "2", "file1.jpg", "abc123"))
-        conn.execute("INSERT INTO Files (id, parentID, name, contentID) VALUES (?, ?, ?, ?)", 
-                    ("2", "1", "folder", None))
-        conn.commit()
-        conn.close()
+        db_path = create_test_db_with_rows(
+            tmp_path,
+            "INSERT INTO Files (id, parentID, name, contentID)"
+            " VALUES ('1', '2', 'file1.jpg', 'abc123'), ('2', '1', 'folder', NULL);"
+        )
         
         file_dic = load_files_from_db(str(db_path))
         